@@ -0,0 +1,74 @@
+import asyncio
+import logging
+import random
+from typing import Any, Awaitable, Callable
+
+import cohere
+import httpx
+from cohere.core.api_error import ApiError
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class CohereAsyncSession:
+    """
+    Shared pooled HTTP session for the async Cohere clients.
+    Bounds in-flight requests and retries transient failures with
+    exponential backoff. This is the only retry layer: the SDK's own
+    retries are disabled.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        max_connections: int = 20,
+        max_concurrency: int = 10,
+        timeout: float = 30.0,
+        max_retries: int = 3,
+        retry_backoff: float = 0.5
+    ):
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections
+            ),
+            timeout=timeout
+        )
+        self.client = cohere.AsyncClient(
+            api_key=api_key,
+            httpx_client=self.http_client,
+            timeout=timeout
+        )
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.request_options = {"max_retries": 0}
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        if isinstance(error, ApiError):
+            return error.status_code in RETRYABLE_STATUS_CODES
+        return isinstance(error, (httpx.TimeoutException, httpx.TransportError))
+
+    async def call(self, operation: str, request: Callable[..., Awaitable[Any]], **kwargs) -> Any:
+        """Run a Cohere request under the concurrency limit, retrying transient errors."""
+        attempt = 0
+        while True:
+            try:
+                async with self.semaphore:
+                    return await request(**kwargs, request_options=self.request_options)
+            except Exception as e:
+                if attempt >= self.max_retries or not self._is_retryable(e):
+                    raise
+                delay = self.retry_backoff * (2 ** attempt) * (1 + random.random())
+                attempt += 1
+                logger.warning(
+                    "Cohere %s failed (%s), retry %d/%d in %.2fs",
+                    operation, e, attempt, self.max_retries, delay
+                )
+                await asyncio.sleep(delay)
+
+    async def close(self):
+        await self.http_client.aclose()
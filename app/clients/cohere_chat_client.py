@@ -1,18 +1,21 @@
-import cohere
-from typing import List
+from typing import AsyncIterator, List
+from app.clients.cohere_async_session import CohereAsyncSession
 
-class CohereChatClient:
-    def __init__(self, api_key: str):
-        self.api_key = api_key
-        self.client = cohere.Client(api_key)
+class AsyncCohereChatClient:
+    """Cohere chat over the shared async session."""
 
-    def chat(self, message: str, documents: List[dict] = None, system: str = "") -> str:
+    def __init__(self, session: CohereAsyncSession):
+        self.session = session
+
+    async def chat(self, message: str, documents: List[dict] = None, system: str = "") -> str:
         """
-        Chat with Cohere's LLM.
+        Chat with Cohere's LLM without blocking the event loop.
         'documents' is an optional list of dicts with a 'text' key.
         """
         try:
-            response = self.client.chat(
+            response = await self.session.call(
+                "chat",
+                self.session.client.chat,
                 message=message,
                 documents=documents,
                 preamble=system  # System prompt in Cohere
@@ -20,3 +23,24 @@ class CohereChatClient:
             return response.text
         except Exception as e:
             raise ValueError(f"Cohere chat failed: {str(e)}")
+
+    async def chat_stream(self, message: str, documents: List[dict] = None, system: str = "") -> AsyncIterator[str]:
+        """
+        Stream the answer as text deltas. Closing this generator (e.g. when
+        the HTTP client disconnects) closes the upstream Cohere stream too.
+        """
+        async with self.session.semaphore:
+            stream = self.session.client.chat_stream(
+                message=message,
+                documents=documents,
+                preamble=system,  # System prompt in Cohere
+                request_options=self.session.request_options
+            )
+            try:
+                async for event in stream:
+                    if event.event_type == "text-generation":
+                        yield event.text
+            except Exception as e:
+                raise ValueError(f"Cohere chat stream failed: {str(e)}")
+            finally:
+                await stream.aclose()
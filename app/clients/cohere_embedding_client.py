@@ -1,26 +1,40 @@
-import cohere
-from typing import List
+from typing import List, Optional
+from app.clients.cohere_async_session import CohereAsyncSession
+from app.clients.embedding_backend import EmbeddingBackend
+
+# Output size of Cohere's embedding models
+COHERE_EMBED_DIMENSIONS = {
+    "embed-english-v3.0": 1024,
+    "embed-multilingual-v3.0": 1024,
+    "embed-english-light-v3.0": 384,
+    "embed-multilingual-light-v3.0": 384,
+}
+
+class AsyncCohereEmbeddingClient(EmbeddingBackend):
+    """Cohere embeddings over the shared async session."""
 
-class CohereEmbeddingClient:
     def __init__(
         self,
-        api_key: str,
+        session: CohereAsyncSession,
         model: str = "embed-english-v3.0",
-        input_type: str = "search_document"
+        input_type: str = "search_document",
+        dimension: Optional[int] = None
     ):
-        self.api_key = api_key
+        self.session = session
         self.model = model
         self.input_type = input_type
-        self.client = cohere.Client(api_key)
+        self.dimension = dimension or COHERE_EMBED_DIMENSIONS.get(model, 1024)
 
-    def embed(self, texts: List[str]) -> List[List[float]]:
+    async def embed(self, texts: List[str], input_type: Optional[str] = None) -> List[List[float]]:
         """
         Generate embeddings for a list of texts.
-        Cohere's SDK is synchronous, so no async/await here.
+        'input_type' overrides the client default (e.g. "search_query").
         """
-        response = self.client.embed(
+        response = await self.session.call(
+            "embed",
+            self.session.client.embed,
             texts=texts,
             model=self.model,
-            input_type=self.input_type
+            input_type=input_type or self.input_type
         )
         return response.embeddings
@@ -0,0 +1,20 @@
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+EMBEDDING_BACKENDS = ("cohere", "hashing", "sentence-transformers")
+
+
+class EmbeddingBackend(ABC):
+    """
+    Interface shared by the embedding clients. 'model' and 'input_type'
+    namespace cache keys, so vectors from different backends never mix;
+    'dimension' sizes the vector collection.
+    """
+
+    model: str
+    input_type: str
+    dimension: int
+
+    @abstractmethod
+    async def embed(self, texts: List[str], input_type: Optional[str] = None) -> List[List[float]]:
+        """One vector per text, in input order."""
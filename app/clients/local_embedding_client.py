@@ -0,0 +1,80 @@
+import asyncio
+import hashlib
+from typing import List, Optional
+
+import numpy as np
+
+from app.clients.embedding_backend import EmbeddingBackend
+from app.utils.tokenizer import tokenize
+
+
+class HashingEmbeddingClient(EmbeddingBackend):
+    """
+    Deterministic, dependency-free embeddings: word unigrams and bigrams are
+    hashed into 'dimension' signed buckets and L2-normalized. Similarity is
+    purely lexical, which makes it useful for offline runs and tests.
+    """
+
+    def __init__(self, dimension: int = 1024, input_type: str = "search_document"):
+        self.dimension = dimension
+        self.model = f"hashing-{dimension}"
+        self.input_type = input_type
+
+    async def embed(self, texts: List[str], input_type: Optional[str] = None) -> List[List[float]]:
+        # Same vectors for documents and queries; 'input_type' only matters to cache keys
+        return await asyncio.to_thread(self._embed_batch, texts)
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        matrix = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = tokenize(text)
+            features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+            if not features:
+                continue
+            digests = [hashlib.blake2b(f.encode("utf-8"), digest_size=8).digest() for f in features]
+            hashes = np.frombuffer(b"".join(digests), dtype=np.uint64)
+            buckets = (hashes % self.dimension).astype(np.int64)
+            signs = np.where((hashes >> np.uint64(63)) == 1, -1.0, 1.0).astype(np.float32)
+            np.add.at(matrix[row], buckets, signs)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.maximum(norms, 1e-12)
+        return matrix.tolist()
+
+
+class SentenceTransformerEmbeddingClient(EmbeddingBackend):
+    """
+    Local CPU/GPU embeddings from a sentence-transformers model. The
+    package is optional and only imported when this backend is selected.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        device: str = "cpu",
+        batch_size: int = 32,
+        input_type: str = "search_document"
+    ):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError(
+                "EMBEDDING_BACKEND=sentence-transformers requires the 'sentence-transformers' package"
+            ) from e
+        self.encoder = SentenceTransformer(model_name, device=device)
+        self.model = model_name
+        self.input_type = input_type
+        self.batch_size = batch_size
+        self.dimension = self.encoder.get_sentence_embedding_dimension()
+
+    async def embed(self, texts: List[str], input_type: Optional[str] = None) -> List[List[float]]:
+        return await asyncio.to_thread(self._embed_batch, texts)
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        vectors = self.encoder.encode(
+            texts,
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+        return np.asarray(vectors, dtype=np.float32).tolist()
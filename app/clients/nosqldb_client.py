@@ -1,9 +1,15 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 
 class MongoDBClient:
-    def __init__(self, uri: str, db_name: str):
-        self.client = AsyncIOMotorClient(uri)  
+    def __init__(self, uri: str, db_name: str, **client_options):
+        # Pool sizes / timeouts (maxPoolSize, serverSelectionTimeoutMS, ...);
+        # unset options keep the driver defaults
+        options = {key: value for key, value in client_options.items() if value is not None}
+        self.client = AsyncIOMotorClient(uri, **options)
         self.db = self.client[db_name]
 
     def get_db(self):
-        return self.db
\ No newline at end of file
+        return self.db
+
+    def close(self):
+        self.client.close()
@@ -1,4 +1,4 @@
-from qdrant_client import QdrantClient
+from qdrant_client import QdrantClient, AsyncQdrantClient
 import logging
 
 logger = logging.getLogger(__name__)
@@ -8,6 +8,7 @@ class QdrantDBClient:
         self.collection_name = collection_name
         try:
             self.client = QdrantClient(url=url, api_key=api_key)
+            self.async_client = AsyncQdrantClient(url=url, api_key=api_key)
             logger.info("Initialized Qdrant client for collection '%s'.", self.collection_name)
         except Exception as e:
             logger.error("Failed to initialize QdrantClient: %s", e)
@@ -15,3 +16,6 @@ class QdrantDBClient:
 
     def get_client(self):
         return self.client
+
+    def get_async_client(self):
+        return self.async_client
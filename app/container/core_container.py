@@ -1,20 +1,54 @@
+from concurrent.futures import ProcessPoolExecutor
+
 from app.clients.nosqldb_client import MongoDBClient
 from app.clients.vectordb_client import QdrantDBClient
-from app.clients.cohere_embedding_client import CohereEmbeddingClient
+from app.clients.cohere_async_session import CohereAsyncSession
+from app.clients.cohere_embedding_client import AsyncCohereEmbeddingClient
+from app.clients.embedding_backend import EMBEDDING_BACKENDS
+from app.clients.local_embedding_client import HashingEmbeddingClient, SentenceTransformerEmbeddingClient
 
 from app.repositories.mongo_repository import MongoRepository
-from app.repositories.qdrant_repository import QdrantRepository
+from app.repositories.qdrant_repository import QdrantRepository, CollectionLayout
+from app.repositories.local_vector_repository import LocalVectorRepository
 
 from app.services.file_processing import FileProcessingService
+from app.services.pdf_extraction import PdfTextExtractor
 from app.services.semantic_search import SemanticSearchService
+from app.services.embedding_scheduler import EmbeddingScheduler
+from app.services.embedding_cache import EmbeddingCache
+from app.services.query_cache import QueryCache
+from app.services.answer_cache import AnswerCache
+from app.services.prompt_cache import PromptCache, PromptTemplate
+from app.prompts import LANGUAGE_PROMPTS
+from app.services.user_cache import UserCache
+from app.security.hashing import PasswordHasher
+from app.services.lexical_index import LexicalIndexStore
+from app.services.reranker import (
+    RerankStage,
+    Reranker,
+    LexicalOverlapReranker,
+    CosineReranker,
+    RERANK_SCORERS
+)
+from app.services.context_builder import ContextBuilder
 from app.services.llm_search import LLMSearchService
-from app.clients.cohere_chat_client import CohereChatClient
+from app.services.ingestion_jobs import IngestionJobService
+from app.clients.cohere_chat_client import AsyncCohereChatClient
 from app.core.config import settings
 from app.repositories.prompt_repository import PromptRepository
+from app.repositories.job_repository import JobRepository
+from app.repositories.embedding_cache_repository import EmbeddingCacheRepository
 # === Clients ===
 mongo_client = MongoDBClient(
     uri=settings.MONGO_URI,
-    db_name=settings.MONGODB_DATABASE
+    db_name=settings.MONGODB_DATABASE,
+    maxPoolSize=settings.MONGO_MAX_POOL_SIZE,
+    minPoolSize=settings.MONGO_MIN_POOL_SIZE,
+    maxIdleTimeMS=settings.MONGO_MAX_IDLE_TIME_MS,
+    connectTimeoutMS=settings.MONGO_CONNECT_TIMEOUT_MS,
+    serverSelectionTimeoutMS=settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    socketTimeoutMS=settings.MONGO_SOCKET_TIMEOUT_MS,
+    waitQueueTimeoutMS=settings.MONGO_WAIT_QUEUE_TIMEOUT_MS
 )
 
 qdrant_client = QdrantDBClient(
@@ -24,30 +58,204 @@ qdrant_client = QdrantDBClient(
 )
 
 
-cohere_embedding_client = CohereEmbeddingClient(api_key=settings.COHERE_API_KEY)
-cohere_chat_client = CohereChatClient(api_key=settings.COHERE_API_KEY)
+cohere_session = CohereAsyncSession(
+    api_key=settings.COHERE_API_KEY,
+    max_connections=settings.COHERE_MAX_CONNECTIONS,
+    max_concurrency=settings.COHERE_MAX_CONCURRENCY,
+    timeout=settings.COHERE_TIMEOUT_SECONDS,
+    max_retries=settings.COHERE_MAX_RETRIES,
+    retry_backoff=settings.COHERE_RETRY_BACKOFF_SECONDS
+)
+if settings.EMBEDDING_BACKEND not in EMBEDDING_BACKENDS:
+    raise ValueError(
+        f"EMBEDDING_BACKEND must be one of {EMBEDDING_BACKENDS}, got '{settings.EMBEDDING_BACKEND}'"
+    )
+if settings.EMBEDDING_BACKEND == "hashing":
+    embedding_client = HashingEmbeddingClient(dimension=settings.EMBEDDING_DIMENSION or 1024)
+elif settings.EMBEDDING_BACKEND == "sentence-transformers":
+    embedding_client = SentenceTransformerEmbeddingClient(
+        model_name=settings.LOCAL_EMBEDDING_MODEL,
+        device=settings.LOCAL_EMBEDDING_DEVICE,
+        batch_size=settings.LOCAL_EMBEDDING_BATCH_SIZE
+    )
+else:
+    embedding_client = AsyncCohereEmbeddingClient(
+        session=cohere_session,
+        model=settings.COHERE_EMBED_MODEL,
+        dimension=settings.EMBEDDING_DIMENSION
+    )
+cohere_chat_client = AsyncCohereChatClient(session=cohere_session)
 # === Repositories ===
 mongo_repository = MongoRepository(mongo_client)
-qdrant_repository = QdrantRepository(qdrant_client)
+collection_layout = CollectionLayout(
+    vector_size=embedding_client.dimension,
+    on_disk=settings.QDRANT_VECTORS_ON_DISK,
+    quantization=settings.QDRANT_QUANTIZATION,
+    quantization_always_ram=settings.QDRANT_QUANTIZATION_ALWAYS_RAM,
+    rescore=settings.QDRANT_SEARCH_RESCORE,
+    oversampling=settings.QDRANT_SEARCH_OVERSAMPLING,
+    hnsw_m=settings.QDRANT_HNSW_M,
+    hnsw_ef_construct=settings.QDRANT_HNSW_EF_CONSTRUCT,
+    hnsw_on_disk=settings.QDRANT_HNSW_ON_DISK,
+    hnsw_ef_search=settings.QDRANT_HNSW_EF_SEARCH
+)
+if settings.VECTOR_STORE not in ("qdrant", "local"):
+    raise ValueError(f"VECTOR_STORE must be 'qdrant' or 'local', got '{settings.VECTOR_STORE}'")
+# Services only use the repository interface, so the local store is a drop-in
+if settings.VECTOR_STORE == "local":
+    qdrant_repository = LocalVectorRepository(
+        directory=settings.LOCAL_VECTOR_DIR,
+        dimension=embedding_client.dimension,
+        index_mode=settings.LOCAL_VECTOR_INDEX,
+        ivf_min_points=settings.LOCAL_IVF_MIN_POINTS,
+        ivf_nprobe=settings.LOCAL_IVF_NPROBE
+    )
+else:
+    qdrant_repository = QdrantRepository(
+        qdrant_client,
+        upsert_batch_size=settings.QDRANT_UPSERT_BATCH_SIZE,
+        upsert_parallelism=settings.QDRANT_UPSERT_PARALLELISM,
+        upsert_wait=settings.QDRANT_UPSERT_WAIT,
+        upsert_max_retries=settings.QDRANT_UPSERT_MAX_RETRIES,
+        tenant_mode=settings.QDRANT_TENANT_MODE,
+        layout=collection_layout
+    )
 prompt_repository = PromptRepository(mongo_client.db)
+job_repository = JobRepository(mongo_client.db)
+embedding_cache_repository = EmbeddingCacheRepository(mongo_client.db)
+# === Executors ===
+cpu_executor = ProcessPoolExecutor(max_workers=settings.INGESTION_PROCESS_POOL_SIZE)
 # === Services ===
+embedding_scheduler = EmbeddingScheduler(
+    embedding_client=embedding_client,
+    batch_size=settings.EMBED_BATCH_SIZE,
+    max_concurrent_batches=settings.EMBED_MAX_CONCURRENT_BATCHES
+)
+
+embedding_cache = EmbeddingCache(
+    repository=embedding_cache_repository if settings.EMBEDDING_CACHE_PERSIST else None,
+    max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES
+)
+
+query_cache = QueryCache(
+    ttl_seconds=settings.QUERY_CACHE_TTL_SECONDS,
+    max_entries=settings.QUERY_CACHE_MAX_ENTRIES,
+    max_embedding_bytes=settings.QUERY_EMBEDDING_CACHE_MAX_BYTES,
+    max_result_bytes=settings.SEARCH_RESULT_CACHE_MAX_BYTES
+)
+
+lexical_index_store = LexicalIndexStore(
+    directory=settings.LEXICAL_INDEX_DIR,
+    max_loaded=settings.LEXICAL_INDEX_CACHE_SIZE
+)
+
 semantic_search_service = SemanticSearchService(
-    cohere_client=cohere_embedding_client,
-    qdrant_repository=qdrant_repository
+    cohere_client=embedding_client,
+    qdrant_repository=qdrant_repository,
+    embedding_scheduler=embedding_scheduler,
+    embedding_cache=embedding_cache,
+    query_cache=query_cache,
+    lexical_index_store=lexical_index_store,
+    default_mode=settings.SEARCH_DEFAULT_MODE,
+    hybrid_candidates=settings.HYBRID_CANDIDATES,
+    rrf_k=settings.RRF_K,
+    chunker=settings.CHUNKER,
+    chunk_tokens=settings.CHUNK_TOKENS,
+    chunk_overlap_tokens=settings.CHUNK_OVERLAP_TOKENS
+)
+
+pdf_extractor = PdfTextExtractor(
+    executor=cpu_executor,
+    pages_per_range=settings.PDF_PAGES_PER_RANGE,
+    max_parallel_ranges=settings.PDF_MAX_PARALLEL_RANGES
 )
 
 file_processing_service = FileProcessingService(
     mongo_repository=mongo_repository,
-    semantic_search_service=semantic_search_service
+    semantic_search_service=semantic_search_service,
+    pdf_extractor=pdf_extractor,
+    batch_size=settings.INGEST_CHUNK_BATCH_SIZE
+)
+
+ingestion_job_service = IngestionJobService(
+    file_processing_service=file_processing_service,
+    job_repository=job_repository,
+    workers=settings.INGESTION_WORKERS,
+    queue_size=settings.INGESTION_QUEUE_SIZE,
+    heartbeat_seconds=settings.INGESTION_HEARTBEAT_SECONDS,
+    stale_seconds=settings.INGESTION_STALE_SECONDS
+)
+
+if settings.RERANK_SCORER not in RERANK_SCORERS:
+    raise ValueError(f"Unknown RERANK_SCORER '{settings.RERANK_SCORER}', expected one of {RERANK_SCORERS}")
+if settings.RERANK_SCORER == "lexical":
+    reranker = LexicalOverlapReranker(
+        lexical_weight=settings.RERANK_LEXICAL_WEIGHT,
+        max_text_chars=settings.RERANK_MAX_TEXT_CHARS
+    )
+elif settings.RERANK_SCORER == "cosine":
+    reranker = CosineReranker(
+        embedding_cache=embedding_cache,
+        model=embedding_client.model,
+        input_type=embedding_client.input_type
+    )
+else:
+    reranker = Reranker()
+
+rerank_stage = RerankStage(
+    reranker=reranker,
+    budget_ms=settings.RERANK_BUDGET_MS
+)
+
+context_builder = ContextBuilder(
+    token_budget=settings.LLM_CONTEXT_TOKEN_BUDGET,
+    near_duplicate_threshold=settings.CONTEXT_NEAR_DUPLICATE_THRESHOLD
+)
+
+password_hasher = PasswordHasher(
+    rounds=settings.BCRYPT_ROUNDS,
+    max_workers=settings.PASSWORD_HASH_WORKERS
+)
+
+user_cache = UserCache(
+    mongo_repository=mongo_repository,
+    ttl_seconds=settings.USER_CACHE_TTL_SECONDS,
+    max_entries=settings.USER_CACHE_MAX_ENTRIES
 )
 
+prompt_cache = PromptCache(
+    prompt_repository=prompt_repository,
+    poll_seconds=settings.PROMPT_CACHE_POLL_SECONDS,
+    use_change_streams=settings.PROMPT_CACHE_USE_CHANGE_STREAMS,
+    fallbacks={
+        name: PromptTemplate(name, "", template)
+        for name, template in LANGUAGE_PROMPTS.items()
+    }
+)
+
+answer_cache = None
+if settings.ANSWER_CACHE_ENABLED:
+    answer_cache = AnswerCache(
+        ttl_seconds=settings.ANSWER_CACHE_TTL_SECONDS,
+        max_entries=settings.ANSWER_CACHE_MAX_ENTRIES,
+        similarity_threshold=settings.ANSWER_CACHE_SIMILARITY_THRESHOLD
+    )
+    query_cache.add_invalidation_listener(answer_cache.invalidate_file)
+    prompt_cache.add_change_listener(answer_cache.invalidate_prompt)
+
 llm_search_service = LLMSearchService(
     semantic_search_service=semantic_search_service,
-    cohere_embedding_client=cohere_embedding_client,
+    cohere_embedding_client=embedding_client,
     cohere_chat_client=cohere_chat_client,
     qdrant_repository=qdrant_repository,
     mongo_repository=mongo_repository,
-    prompt_repository=prompt_repository 
+    prompt_repository=prompt_repository,
+    prompt_cache=prompt_cache,
+    rerank_stage=rerank_stage,
+    context_builder=context_builder,
+    rerank_candidates=settings.RERANK_CANDIDATES,
+    answer_cache=answer_cache,
+    prompt_names_by_language=settings.PROMPT_BY_LANGUAGE
 )
 
 # === Container Class ===
@@ -56,17 +264,37 @@ class Container:
         # Clients
         self.mongo_client = mongo_client
         self.qdrant_client = qdrant_client
-        self.cohere_client = cohere_embedding_client
+        self.cohere_session = cohere_session
+        self.embedding_client = embedding_client
+        self.cohere_client = embedding_client
+        self.cohere_chat_client = cohere_chat_client
 
         # Repositories
         self.mongo_repository = mongo_repository
         self.qdrant_repository = qdrant_repository
         self.prompt_repository = prompt_repository
+        self.job_repository = job_repository
+        self.embedding_cache_repository = embedding_cache_repository
+
+        # Executors
+        self.cpu_executor = cpu_executor
 
         # Services
+        self.embedding_scheduler = embedding_scheduler
+        self.embedding_cache = embedding_cache
+        self.query_cache = query_cache
+        self.lexical_index_store = lexical_index_store
         self.semantic_search_service = semantic_search_service
+        self.pdf_extractor = pdf_extractor
         self.file_processing_service = file_processing_service
+        self.rerank_stage = rerank_stage
+        self.context_builder = context_builder
+        self.password_hasher = password_hasher
+        self.user_cache = user_cache
+        self.prompt_cache = prompt_cache
+        self.answer_cache = answer_cache
         self.llm_search_service = llm_search_service
+        self.ingestion_job_service = ingestion_job_service
 
         # Alias for route usage
         self.file_search_service = file_processing_service
@@ -1,3 +1,4 @@
+from typing import Dict, Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -13,6 +14,139 @@ class Settings(BaseSettings):
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
 
+    # Mongo connection pool; None keeps the driver default
+    MONGO_MAX_POOL_SIZE: int = 100
+    MONGO_MIN_POOL_SIZE: int = 0
+    MONGO_MAX_IDLE_TIME_MS: Optional[int] = None
+    MONGO_CONNECT_TIMEOUT_MS: int = 10000
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 10000
+    MONGO_SOCKET_TIMEOUT_MS: Optional[int] = None
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: Optional[int] = None
+    FILES_PAGE_SIZE: int = 100
+    FILES_MAX_PAGE_SIZE: int = 1000
+
+    # "shared" or "partitioned" (per-user HNSW graphs, user_id filter required)
+    QDRANT_TENANT_MODE: str = "shared"
+
+    # Qdrant collection layout; apply to an existing collection with
+    # `python -m app.scripts.migrate_collection`
+    QDRANT_QUANTIZATION: str = "none"  # "none", "scalar" or "binary"
+    QDRANT_QUANTIZATION_ALWAYS_RAM: bool = True
+    QDRANT_SEARCH_RESCORE: bool = True
+    QDRANT_SEARCH_OVERSAMPLING: float = 2.0
+    QDRANT_VECTORS_ON_DISK: bool = False
+    QDRANT_HNSW_M: Optional[int] = None
+    QDRANT_HNSW_EF_CONSTRUCT: Optional[int] = None
+    QDRANT_HNSW_ON_DISK: Optional[bool] = None
+    QDRANT_HNSW_EF_SEARCH: Optional[int] = None
+
+    # Vector store: "qdrant", or "local" for an in-process index under
+    # LOCAL_VECTOR_DIR (small tenants, tests). LOCAL_VECTOR_INDEX is
+    # "exact" or "ivf" (inverted file for files of LOCAL_IVF_MIN_POINTS+)
+    VECTOR_STORE: str = "qdrant"
+    LOCAL_VECTOR_DIR: str = "data/vectors"
+    LOCAL_VECTOR_INDEX: str = "exact"
+    LOCAL_IVF_MIN_POINTS: int = 4096
+    LOCAL_IVF_NPROBE: int = 8
+
+    # Qdrant bulk upserts
+    QDRANT_UPSERT_BATCH_SIZE: int = 128
+    QDRANT_UPSERT_PARALLELISM: int = 4
+    QDRANT_UPSERT_WAIT: bool = True
+    QDRANT_UPSERT_MAX_RETRIES: int = 3
+
+    # Embedding backend: "cohere", "hashing" (offline, deterministic) or
+    # "sentence-transformers" (local model, optional package)
+    EMBEDDING_BACKEND: str = "cohere"
+    COHERE_EMBED_MODEL: str = "embed-english-v3.0"
+    # Vector size override; otherwise taken from the backend
+    EMBEDDING_DIMENSION: Optional[int] = None
+    LOCAL_EMBEDDING_MODEL: str = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+    LOCAL_EMBEDDING_DEVICE: str = "cpu"
+    LOCAL_EMBEDDING_BATCH_SIZE: int = 32
+
+    # Cohere HTTP session (the only layer that retries Cohere requests)
+    COHERE_MAX_CONNECTIONS: int = 20
+    COHERE_MAX_CONCURRENCY: int = 10
+    COHERE_TIMEOUT_SECONDS: float = 30.0
+    COHERE_MAX_RETRIES: int = 3
+    COHERE_RETRY_BACKOFF_SECONDS: float = 0.5
+
+    # Chunking: "sentence" (language-aware, token-sized) or "character"
+    # (legacy 500-char newline splitter). Changing it re-chunks files on re-ingest.
+    CHUNKER: str = "sentence"
+    CHUNK_TOKENS: int = 200
+    CHUNK_OVERLAP_TOKENS: int = 30
+
+    # Embedding batches
+    EMBED_BATCH_SIZE: int = 96
+    EMBED_MAX_CONCURRENT_BATCHES: int = 4
+
+    # Embedding cache
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 10000
+    EMBEDDING_CACHE_PERSIST: bool = True
+
+    # Query embedding / search result cache
+    QUERY_CACHE_TTL_SECONDS: float = 300.0
+    QUERY_CACHE_MAX_ENTRIES: int = 10000
+    QUERY_EMBEDDING_CACHE_MAX_BYTES: int = 16 * 1024 * 1024
+    SEARCH_RESULT_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+
+    # Hybrid retrieval
+    SEARCH_DEFAULT_MODE: str = "hybrid"  # "hybrid", "dense" or "lexical"
+    HYBRID_CANDIDATES: int = 20
+    RRF_K: int = 60
+    LEXICAL_INDEX_DIR: str = "data/lexical"
+    LEXICAL_INDEX_CACHE_SIZE: int = 64
+
+    # Batch search (/search/batch)
+    BATCH_SEARCH_MAX_QUERIES: int = 96  # one Cohere embed call
+    BATCH_SEARCH_MAX_REQUESTS: int = 500  # queries x file_ids per Qdrant batch
+
+    # Reranking / LLM context
+    RERANK_SCORER: str = "lexical"  # "none", "lexical" or "cosine"
+    RERANK_CANDIDATES: int = 50
+    RERANK_BUDGET_MS: float = 30.0
+    RERANK_LEXICAL_WEIGHT: float = 0.5
+    RERANK_MAX_TEXT_CHARS: int = 2000  # chunk prefix the lexical scorer tokenizes
+    LLM_CONTEXT_TOKEN_BUDGET: int = 1500
+    CONTEXT_NEAR_DUPLICATE_THRESHOLD: float = 0.9
+
+    # Authentication
+    USER_CACHE_TTL_SECONDS: float = 60.0
+    USER_CACHE_MAX_ENTRIES: int = 10000
+    # Trust the claims of tokens issued less than this many seconds ago
+    # without looking the user up (0 disables)
+    AUTH_TRUST_TOKEN_SECONDS: int = 0
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+
+    # Prompt template cache
+    # Prompt used for a question in each detected language when none is named;
+    # "arabic" and "english" fall back to the built-in app.prompts templates
+    PROMPT_BY_LANGUAGE: Dict[str, str] = {"arabic": "arabic", "english": "english"}
+    PROMPT_CACHE_POLL_SECONDS: float = 60.0
+    PROMPT_CACHE_USE_CHANGE_STREAMS: bool = True
+
+    # LLM answer cache
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_TTL_SECONDS: float = 3600.0
+    ANSWER_CACHE_MAX_ENTRIES: int = 2000
+    # Opt-in near-duplicate lookup (e.g. 0.95); None serves exact matches only
+    ANSWER_CACHE_SIMILARITY_THRESHOLD: Optional[float] = None
+
+    # Background ingestion
+    INGESTION_WORKERS: int = 2
+    INGESTION_QUEUE_SIZE: int = 100
+    INGESTION_PROCESS_POOL_SIZE: int = 2
+    # Running jobs heartbeat; other processes resume them once they go quiet
+    INGESTION_HEARTBEAT_SECONDS: float = 15.0
+    INGESTION_STALE_SECONDS: float = 60.0
+    INGEST_CHUNK_BATCH_SIZE: int = 256
+    UPLOAD_READ_BLOCK_SIZE: int = 1024 * 1024
+    PDF_PAGES_PER_RANGE: int = 8
+    PDF_MAX_PARALLEL_RANGES: int = 4
+
     class Config:
         env_file = ".env"
 
@@ -6,7 +6,8 @@ from app.routes import question_routes
 
 logging.basicConfig(level=logging.DEBUG)
 
-from app.routes import auth_routes, file_routes, search_routes
+from app.routes import auth_routes, file_routes, search_routes, metrics_routes
+from app.container.core_container import container
 
 app = FastAPI(
     title="Document Search API",
@@ -28,6 +29,26 @@ app.include_router(file_routes.router, prefix="/upload", tags=["Upload"])
 app.include_router(search_routes.router, prefix="/search", tags=["Search"])
 app.include_router(question_routes.router, prefix="/questions", tags=["Questions"])
 app.include_router(file_routes.router, prefix="/files", tags=["Files"])
+app.include_router(metrics_routes.router, prefix="/metrics", tags=["Metrics"])
+
+@app.on_event("startup")
+async def start_background_workers():
+    for repository in (container.mongo_repository, container.prompt_repository, container.job_repository):
+        await repository.ensure_indexes()
+    await container.prompt_cache.start()
+    await container.ingestion_job_service.start()
+
+
+@app.on_event("shutdown")
+async def stop_background_workers():
+    await container.ingestion_job_service.stop()
+    await container.prompt_cache.stop()
+    container.cpu_executor.shutdown(wait=False)
+    container.password_hasher.shutdown()
+    await container.cohere_session.close()
+    await container.qdrant_client.get_async_client().close()
+    container.mongo_client.close()
+
 # Root endpoint
 @app.get("/")
 def read_root():
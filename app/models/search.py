@@ -0,0 +1,48 @@
+from pydantic import BaseModel
+from typing import Any, Dict, Iterable, List, Optional
+
+# Payload keys returned by the search routes unless the caller asks for others
+DEFAULT_PAYLOAD_FIELDS = ["text", "file_id", "filename", "chunk_index"]
+
+
+class SearchHit(BaseModel):
+    id: str
+    score: float
+    payload: Dict[str, Any]
+
+
+class SearchResponse(BaseModel):
+    matches: List[SearchHit]
+
+
+class BatchQueryResult(BaseModel):
+    query: str
+    files: Dict[str, List[SearchHit]]
+
+
+class BatchSearchResponse(BaseModel):
+    results: List[BatchQueryResult]
+
+
+def resolve_payload_fields(fields: Optional[str], include_text: bool = True) -> List[str]:
+    """Payload keys to fetch from a comma-separated 'fields' parameter."""
+    selected = [f.strip() for f in fields.split(",") if f.strip()] if fields else list(DEFAULT_PAYLOAD_FIELDS)
+    if not include_text:
+        selected = [f for f in selected if f != "text"]
+    return selected
+
+
+def serialize_hits(hits: Iterable, payload_fields: List[str]) -> List[dict]:
+    """
+    Plain dicts for ScoredPoint hits, keeping only 'payload_fields'. Built
+    by hand so the response skips FastAPI's generic encoder.
+    """
+    serialized = []
+    for hit in hits:
+        payload = hit.payload or {}
+        serialized.append({
+            "id": str(hit.id),
+            "score": hit.score,
+            "payload": {key: payload[key] for key in payload_fields if key in payload},
+        })
+    return serialized
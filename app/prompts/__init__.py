@@ -0,0 +1,8 @@
+from app.prompts.arabic_prompt import generate_arabic_prompt
+from app.prompts.english_prompt import generate_english_prompt
+
+# Built-in prompt per detected question language, as {question}/{context} templates
+LANGUAGE_PROMPTS = {
+    "arabic": generate_arabic_prompt("{question}", "{context}"),
+    "english": generate_english_prompt("{question}", "{context}"),
+}
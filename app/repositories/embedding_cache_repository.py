@@ -0,0 +1,32 @@
+from array import array
+from typing import Dict, List
+from bson.binary import Binary
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+
+
+class EmbeddingCacheRepository:
+    """Mongo-backed store of embeddings keyed by content hash, kept as packed float32."""
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.collection = db["embedding_cache"]
+
+    async def get_many(self, keys: List[str]) -> Dict[str, array]:
+        if not keys:
+            return {}
+        cursor = self.collection.find({"_id": {"$in": keys}}, {"vector": 1})
+        found = {}
+        async for doc in cursor:
+            vector = array("f")
+            vector.frombytes(bytes(doc["vector"]))
+            found[doc["_id"]] = vector
+        return found
+
+    async def put_many(self, entries: Dict[str, array]) -> None:
+        if not entries:
+            return
+        operations = [
+            UpdateOne({"_id": key}, {"$set": {"vector": Binary(vector.tobytes())}}, upsert=True)
+            for key, vector in entries.items()
+        ]
+        await self.collection.bulk_write(operations, ordered=False)
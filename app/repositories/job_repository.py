@@ -0,0 +1,74 @@
+from datetime import datetime
+from typing import Optional, Dict, List
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+
+
+class JobRepository:
+    """Persists ingestion job state so queued uploads survive a restart."""
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.collection = db["ingestion_jobs"]
+
+    async def ensure_indexes(self):
+        # Startup scan for unfinished jobs
+        await self.collection.create_index([("status", 1), ("created_at", 1)], name="status_created_at")
+
+    async def create_job(self, job: Dict) -> str:
+        """Create the job for a file, replacing any finished job for the same file."""
+        now = datetime.utcnow()
+        doc = {**job, "_id": job["file_id"], "created_at": now, "updated_at": now}
+        await self.collection.replace_one({"_id": doc["_id"]}, doc, upsert=True)
+        return doc["_id"]
+
+    async def update_job(self, file_id: str, fields: Dict, owner: Optional[str] = None) -> None:
+        """Update a job; with 'owner', only while that worker still holds it."""
+        query = {"_id": file_id}
+        if owner is not None:
+            query["owner"] = owner
+        await self.collection.update_one(
+            query,
+            {"$set": {**fields, "updated_at": datetime.utcnow()}}
+        )
+
+    async def get_job(self, file_id: str) -> Optional[Dict]:
+        return await self.collection.find_one({"_id": file_id})
+
+    async def claim_job(self, file_id: str, owner: str, stale_before: datetime) -> Optional[Dict]:
+        """
+        Atomically mark a queued job, or a running one whose worker stopped
+        heartbeating before 'stale_before', as running by 'owner'. Returns
+        the job as it was before the claim, or None if someone else holds it.
+        """
+        now = datetime.utcnow()
+        return await self.collection.find_one_and_update(
+            {"_id": file_id, "$or": [
+                {"status": "queued"},
+                {"status": "running", "heartbeat_at": {"$lt": stale_before}},
+                {"status": "running", "heartbeat_at": {"$exists": False}},
+            ]},
+            {"$set": {"status": "running", "owner": owner, "heartbeat_at": now, "updated_at": now}},
+            return_document=ReturnDocument.BEFORE
+        )
+
+    async def heartbeat(self, file_id: str, owner: str) -> None:
+        await self.collection.update_one(
+            {"_id": file_id, "owner": owner},
+            {"$set": {"heartbeat_at": datetime.utcnow()}}
+        )
+
+    async def get_resumable_jobs(self, host: str, stale_before: datetime) -> List[Dict]:
+        """
+        Unfinished jobs whose upload is on 'host' and that nobody is
+        working on: queued since before 'stale_before', or running without
+        a heartbeat since then.
+        """
+        cursor = self.collection.find({
+            "host": {"$in": [host, None]},
+            "$or": [
+                {"status": "queued", "updated_at": {"$lt": stale_before}},
+                {"status": "running", "heartbeat_at": {"$lt": stale_before}},
+                {"status": "running", "heartbeat_at": {"$exists": False}},
+            ],
+        }).sort("created_at", 1)
+        return [doc async for doc in cursor]
@@ -0,0 +1,389 @@
+import asyncio
+import json
+import logging
+import os
+import shutil
+import uuid
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from qdrant_client.models import Filter, FieldCondition, MatchAny, MatchValue, ScoredPoint
+
+from app.repositories.qdrant_repository import TENANT_FIELD
+
+logger = logging.getLogger(__name__)
+
+LOCAL_INDEX_MODES = ("exact", "ivf")
+
+_UNASSIGNED = "_unassigned"
+
+
+def _condition_matches(payload: dict, condition: FieldCondition) -> bool:
+    value = payload.get(condition.key)
+    if isinstance(condition.match, MatchValue):
+        return value == condition.match.value
+    if isinstance(condition.match, MatchAny):
+        return value in condition.match.any
+    raise ValueError(f"Unsupported filter condition for the local vector store: {condition}")
+
+
+def _filter_matches(payload: dict, q_filter: Filter) -> bool:
+    """Evaluate the must/must_not keyword conditions this app builds."""
+    if q_filter.should:
+        raise ValueError("'should' filters are not supported by the local vector store")
+    return (
+        all(_condition_matches(payload, c) for c in q_filter.must or [])
+        and not any(_condition_matches(payload, c) for c in q_filter.must_not or [])
+    )
+
+
+def build_ivf(data: np.ndarray, iterations: int = 10) -> Tuple[np.ndarray, List[np.ndarray]]:
+    """Coarse k-means quantizer with ~sqrt(n) inverted lists: (centroids, lists)."""
+    data = np.asarray(data)
+    n_lists = max(1, int(np.sqrt(len(data))))
+    rng = np.random.default_rng(0)
+    centroids = data[rng.choice(len(data), n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(data @ centroids.T, axis=1)
+        for c in range(n_lists):
+            members = data[assignment == c]
+            if len(members):
+                mean = members.mean(axis=0)
+                centroids[c] = mean / (np.linalg.norm(mean) + 1e-12)
+    assignment = np.argmax(data @ centroids.T, axis=1)
+    return centroids, [np.flatnonzero(assignment == c) for c in range(n_lists)]
+
+
+class _FileVectors:
+    """
+    Vectors of one file: a float32 matrix memory-mapped from
+    'vectors.f32' plus one JSON line of id/payload per row in
+    'points.jsonl'. Rows are L2-normalized, so dot product is cosine.
+    """
+
+    def __init__(self, directory: str, dimension: int):
+        self.directory = directory
+        self.dimension = dimension
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self.points_path = os.path.join(directory, "points.jsonl")
+        self.ids: List[str] = []
+        self.payloads: List[dict] = []
+        self.rows: Dict[str, int] = {}
+        self.matrix: Optional[np.memmap] = None
+        # IVF state, rebuilt in the background after the file changes
+        self.centroids: Optional[np.ndarray] = None
+        self.lists: Optional[List[np.ndarray]] = None
+        # Bumped on every change, so an index built from older rows is dropped
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def user_id(self) -> Optional[str]:
+        return self.payloads[0].get(TENANT_FIELD) if self.payloads else None
+
+    def load(self):
+        if os.path.exists(self.points_path):
+            with open(self.points_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    point = json.loads(line)
+                    self.rows[point["id"]] = len(self.ids)
+                    self.ids.append(point["id"])
+                    self.payloads.append(point["payload"])
+        self._map()
+
+    def _map(self):
+        self.version += 1
+        self.centroids = None
+        self.lists = None
+        if not self.ids:
+            self.matrix = None
+            return
+        self.matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(len(self.ids), self.dimension))
+
+    def upsert(self, ids: List[str], vectors: np.ndarray, payloads: List[dict]):
+        os.makedirs(self.directory, exist_ok=True)
+        existing = [i for i, point_id in enumerate(ids) if point_id in self.rows]
+        new = [i for i, point_id in enumerate(ids) if point_id not in self.rows]
+
+        if existing:
+            self.matrix = None
+            writable = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(len(self.ids), self.dimension))
+            for i in existing:
+                row = self.rows[ids[i]]
+                writable[row] = vectors[i]
+                self.payloads[row] = payloads[i]
+            writable.flush()
+            del writable
+            self._write_points()
+
+        if new:
+            with open(self.vectors_path, "ab") as f:
+                f.write(np.ascontiguousarray(vectors[new]).tobytes())
+            with open(self.points_path, "a", encoding="utf-8") as f:
+                for i in new:
+                    self.rows[ids[i]] = len(self.ids)
+                    self.ids.append(ids[i])
+                    self.payloads.append(payloads[i])
+                    f.write(json.dumps({"id": ids[i], "payload": payloads[i]}, ensure_ascii=False) + "\n")
+        self._map()
+
+    def delete(self, point_ids: Set[str]) -> int:
+        keep = [row for row, point_id in enumerate(self.ids) if point_id not in point_ids]
+        removed = len(self.ids) - len(keep)
+        if not removed:
+            return 0
+        remaining = np.array(self.matrix[keep]) if keep else None
+        self.matrix = None
+        self.ids = [self.ids[row] for row in keep]
+        self.payloads = [self.payloads[row] for row in keep]
+        self.rows = {point_id: row for row, point_id in enumerate(self.ids)}
+        if remaining is None:
+            shutil.rmtree(self.directory, ignore_errors=True)
+        else:
+            tmp_path = f"{self.vectors_path}.tmp"
+            remaining.tofile(tmp_path)
+            os.replace(tmp_path, self.vectors_path)
+            self._write_points()
+        self._map()
+        return removed
+
+    def set_payload(self, payload: dict):
+        for stored in self.payloads:
+            stored.update(payload)
+        self._write_points()
+
+    def _write_points(self):
+        tmp_path = f"{self.points_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for point_id, payload in zip(self.ids, self.payloads):
+                f.write(json.dumps({"id": point_id, "payload": payload}, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.points_path)
+
+    def candidate_rows(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        probes = np.argsort(-(self.centroids @ query))[:nprobe]
+        return np.concatenate([self.lists[c] for c in probes])
+
+
+class LocalVectorRepository:
+    """
+    In-process stand-in for QdrantRepository: one memory-mapped vector
+    matrix per file under 'directory', searched with an exact vectorized
+    dot product. In "ivf" mode, files with at least 'ivf_min_points'
+    vectors are searched through a k-means inverted file probing the
+    'ivf_nprobe' closest lists. The k-means runs in a worker thread after
+    a file changes, and the file is searched exactly until it is ready.
+    Meant for small tenants and tests.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        dimension: int,
+        index_mode: str = "exact",
+        ivf_min_points: int = 4096,
+        ivf_nprobe: int = 8
+    ):
+        if index_mode not in LOCAL_INDEX_MODES:
+            raise ValueError(f"Unknown local index mode '{index_mode}', expected one of {LOCAL_INDEX_MODES}")
+        self.directory = directory
+        self.collection_name = directory
+        self.dimension = dimension
+        self.index_mode = index_mode
+        self.ivf_min_points = ivf_min_points
+        self.ivf_nprobe = ivf_nprobe
+        self.tenant_mode = "shared"
+        self.files: Dict[str, _FileVectors] = {}
+        self.point_files: Dict[str, str] = {}
+        self._ivf_builds: Dict[str, asyncio.Task] = {}
+        self._load()
+
+    def _load(self):
+        os.makedirs(self.directory, exist_ok=True)
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if os.path.isdir(path):
+                file_vectors = _FileVectors(path, self.dimension)
+                file_vectors.load()
+                self.files[name] = file_vectors
+                self.point_files.update({point_id: name for point_id in file_vectors.ids})
+        logger.info(f"Loaded {len(self.point_files)} local vectors from {len(self.files)} files")
+
+    def _file(self, file_id: str) -> _FileVectors:
+        file_vectors = self.files.get(file_id)
+        if file_vectors is None:
+            file_vectors = _FileVectors(os.path.join(self.directory, file_id), self.dimension)
+            self.files[file_id] = file_vectors
+        return file_vectors
+
+    async def insert_vectors(
+        self,
+        embeddings,
+        payloads,
+        file_id: Optional[str] = None,
+        wait: Optional[bool] = None,
+        ids: Optional[List[str]] = None
+    ):
+        """Upsert vectors; 'wait' is accepted for interface parity and ignored."""
+        vectors = np.array(embeddings, dtype=np.float32).reshape(-1, self.dimension)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        ids = ids if ids is not None else [str(uuid.uuid4()) for _ in range(len(vectors))]
+        payloads = [{**payload, "file_id": file_id} if file_id is not None else dict(payload) for payload in payloads]
+
+        groups: Dict[str, List[int]] = {}
+        for i, payload in enumerate(payloads):
+            groups.setdefault(str(payload.get("file_id") or _UNASSIGNED), []).append(i)
+        for group_file_id, rows in groups.items():
+            self._file(group_file_id).upsert([ids[i] for i in rows], vectors[rows], [payloads[i] for i in rows])
+            self.point_files.update({ids[i]: group_file_id for i in rows})
+        logger.info("Stored %d vectors in the local vector store", len(ids))
+
+    def delete_collection(self):
+        """Deletes every stored vector (use with caution)."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self.files = {}
+        self.point_files = {}
+        os.makedirs(self.directory, exist_ok=True)
+        logger.info(f"Deleted local vector store '{self.directory}'")
+
+    async def delete_vectors(self, q_filter: Filter):
+        """Deletes only the points matching the provided filter."""
+        for file_id, file_vectors in list(self.files.items()):
+            doomed = {
+                point_id for point_id, payload in zip(file_vectors.ids, file_vectors.payloads)
+                if _filter_matches(payload, q_filter)
+            }
+            self._delete_from_file(file_id, doomed)
+        logger.info(f"Deleted local vectors matching filter: {q_filter}")
+
+    async def get_file_owners(self, q_filter: Filter) -> Dict[str, str]:
+        owners = {}
+        for file_vectors in self.files.values():
+            for payload in file_vectors.payloads:
+                if payload.get("file_id") and payload.get("user_id") and _filter_matches(payload, q_filter):
+                    owners[str(payload["file_id"])] = str(payload["user_id"])
+                    break
+        return owners
+
+    async def get_point_ids(self, file_id: str) -> Set[str]:
+        file_vectors = self.files.get(file_id)
+        return set(file_vectors.ids) if file_vectors else set()
+
+    async def delete_points(self, ids: List[str]):
+        by_file: Dict[str, Set[str]] = {}
+        for point_id in ids:
+            file_id = self.point_files.get(point_id)
+            if file_id is not None:
+                by_file.setdefault(file_id, set()).add(point_id)
+        for file_id, point_ids in by_file.items():
+            self._delete_from_file(file_id, point_ids)
+        logger.info(f"Deleted {len(ids)} local points")
+
+    def _delete_from_file(self, file_id: str, point_ids: Set[str]):
+        file_vectors = self.files[file_id]
+        if point_ids and file_vectors.delete(point_ids):
+            for point_id in point_ids:
+                self.point_files.pop(point_id, None)
+            if not len(file_vectors):
+                del self.files[file_id]
+
+    async def set_file_payload(self, file_id: str, payload: dict):
+        file_vectors = self.files.get(file_id)
+        if file_vectors:
+            file_vectors.set_payload(payload)
+
+    async def search_vectors(
+        self,
+        query_vector: List[float],
+        top_k: int = 5,
+        file_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+        payload_fields: Optional[List[str]] = None
+    ):
+        query = np.array(query_vector, dtype=np.float32)
+        query /= np.linalg.norm(query) + 1e-12
+        return self._search(query, top_k, file_id, None, user_id, payload_fields)
+
+    async def search_vectors_batch(
+        self,
+        searches: List[dict],
+        top_k: int = 5,
+        user_id: Optional[str] = None,
+        payload_fields: Optional[List[str]] = None
+    ) -> list:
+        results = []
+        for search in searches:
+            query = np.array(search["vector"], dtype=np.float32)
+            query /= np.linalg.norm(query) + 1e-12
+            results.append(self._search(
+                query, top_k, search.get("file_id"), search.get("file_ids"), user_id, payload_fields
+            ))
+        return results
+
+    def _schedule_ivf(self, file_id: str, file_vectors: _FileVectors):
+        if file_id not in self._ivf_builds:
+            self._ivf_builds[file_id] = asyncio.get_running_loop().create_task(
+                self._build_ivf(file_id, file_vectors)
+            )
+
+    async def _build_ivf(self, file_id: str, file_vectors: _FileVectors):
+        """Build a file's IVF off the event loop; discarded if the file changed meanwhile."""
+        try:
+            version = file_vectors.version
+            matrix = file_vectors.matrix
+            if matrix is None:
+                return
+            centroids, lists = await asyncio.to_thread(build_ivf, matrix)
+            if file_vectors.version == version:
+                file_vectors.centroids, file_vectors.lists = centroids, lists
+                logger.info(f"Built IVF index for file {file_id} ({len(lists)} lists)")
+        except Exception:
+            logger.exception(f"Building the IVF index for file {file_id} failed")
+        finally:
+            self._ivf_builds.pop(file_id, None)
+
+    def _search(
+        self,
+        query: np.ndarray,
+        top_k: int,
+        file_id: Optional[str],
+        file_ids: Optional[List[str]],
+        user_id: Optional[str],
+        payload_fields: Optional[List[str]]
+    ) -> List[ScoredPoint]:
+        if file_id:
+            candidates = [file_id]
+        elif file_ids:
+            candidates = file_ids
+        else:
+            candidates = list(self.files)
+
+        scored = []
+        for fid in candidates:
+            file_vectors = self.files.get(fid)
+            if not file_vectors or (user_id and file_vectors.user_id != user_id):
+                continue
+            rows = None
+            if self.index_mode == "ivf" and len(file_vectors) >= self.ivf_min_points:
+                if file_vectors.centroids is None:
+                    self._schedule_ivf(fid, file_vectors)
+                else:
+                    rows = file_vectors.candidate_rows(query, self.ivf_nprobe)
+            if rows is not None:
+                scores = file_vectors.matrix[rows] @ query
+            else:
+                scores = file_vectors.matrix @ query
+            best = np.argpartition(-scores, top_k - 1)[:top_k] if len(scores) > top_k else np.arange(len(scores))
+            for i in best:
+                row = int(rows[i]) if rows is not None else int(i)
+                scored.append((float(scores[i]), file_vectors, row))
+
+        scored.sort(key=lambda item: item[0], reverse=True)
+        hits = []
+        for score, file_vectors, row in scored[:top_k]:
+            payload = file_vectors.payloads[row]
+            if payload_fields is not None:
+                payload = {key: payload[key] for key in payload_fields if key in payload}
+            hits.append(ScoredPoint(id=file_vectors.ids[row], version=0, score=score, payload=dict(payload)))
+        return hits
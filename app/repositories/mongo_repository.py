@@ -1,7 +1,12 @@
 from app.clients.nosqldb_client import MongoDBClient
+from bson import ObjectId
 from bson.binary import Binary
-import aiofiles
-from typing import List
+from typing import List, Optional, Tuple
+from pymongo import ASCENDING
+from pymongo.errors import OperationFailure
+import logging
+
+logger = logging.getLogger(__name__)
 
 class MongoRepository:
     def __init__(self, mongo_client: MongoDBClient):
@@ -11,6 +16,20 @@ class MongoRepository:
         self.prompts_collection = self.db["prompt"]
         self.files_collection = self.db["uploaded_files"]
 
+    async def ensure_indexes(self):
+        """Create the indexes the user and file lookups rely on (no-op if present)."""
+        try:
+            await self.users_collection.create_index([("username", ASCENDING)], unique=True, name="username_unique")
+        except OperationFailure as e:
+            # Existing duplicate usernames; fall back to a plain index
+            logger.warning(f"Could not create unique username index: {e}")
+            await self.users_collection.create_index([("username", ASCENDING)], name="username")
+        await self.users_collection.create_index([("email", ASCENDING)], name="email")
+        # Serves the per-user listing in _id order used for cursor pagination
+        await self.files_collection.create_index(
+            [("user_id", ASCENDING), ("_id", ASCENDING)], name="user_id_id"
+        )
+
     async def insert_chunks(self, chunks: list):
         result = await self.documents_collection.insert_many(chunks)
         return result.inserted_ids
@@ -25,9 +44,6 @@ class MongoRepository:
         return await self.users_collection.insert_one(user_data)
 
     async def save_file(self, file_path: str, file_name: str, user_id: str, username: str):
-        async with aiofiles.open(file_path, 'rb') as f:
-            file_bytes = await f.read()
-
         file_doc = {
             "filename": file_name,
             "user_id": user_id,
@@ -36,11 +52,30 @@ class MongoRepository:
         result = await self.files_collection.insert_one(file_doc)
         return result.inserted_id
 
-    async def get_all_files_metadata(self,user_id: str) -> list:
+    async def get_file_by_id(self, file_id: str):
+        return await self.files_collection.find_one({"_id": ObjectId(file_id)})
+
+    async def update_file(self, file_id: str, fields: dict):
+        return await self.files_collection.update_one({"_id": ObjectId(file_id)}, {"$set": fields})
+
+    async def get_all_files_metadata(
+        self,
+        user_id: str,
+        limit: int = 100,
+        after: Optional[str] = None
+    ) -> Tuple[list, Optional[str]]:
+        """
+        One page of the user's files in upload order. 'after' is the cursor
+        returned with the previous page; the returned cursor is None on the
+        last page.
+        """
+        query = {"user_id": user_id}
+        if after:
+            query["_id"] = {"$gt": ObjectId(after)}
         cursor = self.files_collection.find(
-            {"user_id": user_id},
+            query,
             {"_id": 1, "filename": 1, "username": 1, "user_id": 1}
-        )
+        ).sort("_id", ASCENDING).limit(limit + 1)
         files = []
         async for doc in cursor:
             files.append({
@@ -49,4 +84,7 @@ class MongoRepository:
                 "username": doc.get("username", ""),
                 "user_id": str(doc.get("user_id", ""))
             })
-        return files
+        if len(files) > limit:
+            files = files[:limit]
+            return files, files[-1]["file_id"]
+        return files, None
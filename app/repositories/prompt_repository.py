@@ -1,10 +1,13 @@
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
 class PromptRepository:
     def __init__(self, db: AsyncIOMotorDatabase):
         self.collection = db["prompts"]
 
+    async def ensure_indexes(self):
+        await self.collection.create_index("prompt_name", name="prompt_name")
+
     async def insert_prompt(self, system: str, user: str, prompt_name: str) -> str:
         doc = {"system": system, "user": user, "prompt_name": prompt_name}
         res = await self.collection.insert_one(doc)
@@ -12,3 +15,13 @@ class PromptRepository:
 
     async def get_prompt_by_name(self, prompt_name: str) -> Optional[Dict]:
         return await self.collection.find_one({"prompt_name": prompt_name})
+
+    async def get_all_prompts(self) -> List[Dict]:
+        return [doc async for doc in self.collection.find({})]
+
+    def watch(self):
+        """
+        Change stream over the prompts collection with full documents on
+        updates. Requires a replica set or sharded cluster.
+        """
+        return self.collection.watch(full_document="updateLookup")
@@ -1,71 +1,350 @@
-from typing import List, Optional
+from typing import Dict, List, Optional, Set, Tuple
 from app.clients.vectordb_client import QdrantDBClient
 from qdrant_client.models import (
+    CreateAlias,
+    CreateAliasOperation,
     PointStruct,
     VectorParams,
     Distance,
     Filter,
     FieldCondition,
-    MatchValue
+    MatchValue,
+    MatchAny,
+    PointIdsList,
+    QueryRequest,
+    HnswConfigDiff,
+    KeywordIndexParams,
+    KeywordIndexType,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    SearchParams,
+    QuantizationSearchParams
 )
+import asyncio
 import logging
+import time
 import uuid
 
 logger = logging.getLogger(__name__)
 
+TENANT_MODES = ("shared", "partitioned")
+QUANTIZATION_MODES = ("none", "scalar", "binary")
+
+# Keyword payload indexes kept on the collection; user_id doubles as the tenant key
+PAYLOAD_INDEX_FIELDS = ("file_id", "user_id", "username", "filename")
+TENANT_FIELD = "user_id"
+
+# Fixed namespace so the same chunk always maps to the same point id
+POINT_ID_NAMESPACE = uuid.UUID("c0ccad8a-ed21-4012-951f-a91857349fe1")
+
+
+def chunk_point_id(file_id: str, chunk_index: int, content_hash: str) -> str:
+    """Deterministic point id for a chunk, so re-ingesting a file overwrites instead of duplicating."""
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{file_id}:{chunk_index}:{content_hash}"))
+
+
+def file_filter(file_id: str) -> Filter:
+    return Filter(
+        must=[
+            FieldCondition(
+                key="file_id",
+                match=MatchValue(value=file_id)
+            )
+        ]
+    )
+
+
+def scope_filter(
+    file_id: Optional[str] = None,
+    user_id: Optional[str] = None,
+    file_ids: Optional[List[str]] = None
+) -> Optional[Filter]:
+    """Filter restricting a search to one user and/or one file (or any of 'file_ids')."""
+    must = []
+    if user_id:
+        must.append(FieldCondition(key=TENANT_FIELD, match=MatchValue(value=user_id)))
+    if file_id:
+        must.append(FieldCondition(key="file_id", match=MatchValue(value=file_id)))
+    if file_ids:
+        must.append(FieldCondition(key="file_id", match=MatchAny(any=file_ids)))
+    return Filter(must=must) if must else None
+
+
+class CollectionLayout:
+    """
+    Storage layout of the vector collection: vector size, quantization,
+    on-disk storage and HNSW parameters. None leaves Qdrant's default.
+    """
+
+    def __init__(
+        self,
+        vector_size: int = 1024,
+        on_disk: bool = False,
+        quantization: str = "none",
+        quantization_always_ram: bool = True,
+        rescore: bool = True,
+        oversampling: float = 2.0,
+        hnsw_m: Optional[int] = None,
+        hnsw_ef_construct: Optional[int] = None,
+        hnsw_on_disk: Optional[bool] = None,
+        hnsw_ef_search: Optional[int] = None
+    ):
+        if quantization not in QUANTIZATION_MODES:
+            raise ValueError(f"Unknown quantization '{quantization}', expected one of {QUANTIZATION_MODES}")
+        self.vector_size = vector_size
+        self.on_disk = on_disk
+        self.quantization = quantization
+        self.quantization_always_ram = quantization_always_ram
+        self.rescore = rescore
+        self.oversampling = oversampling
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_construct = hnsw_ef_construct
+        self.hnsw_on_disk = hnsw_on_disk
+        self.hnsw_ef_search = hnsw_ef_search
+
+    def vectors_config(self) -> VectorParams:
+        return VectorParams(
+            size=self.vector_size,
+            distance=Distance.COSINE,
+            on_disk=self.on_disk
+        )
+
+    def quantization_config(self):
+        if self.quantization == "scalar":
+            return ScalarQuantization(
+                scalar=ScalarQuantizationConfig(
+                    type=ScalarType.INT8,
+                    quantile=0.99,
+                    always_ram=self.quantization_always_ram
+                )
+            )
+        if self.quantization == "binary":
+            return BinaryQuantization(
+                binary=BinaryQuantizationConfig(always_ram=self.quantization_always_ram)
+            )
+        return None
+
+    def hnsw_config(self, tenant_mode: str = "shared") -> HnswConfigDiff:
+        """
+        In partitioned mode the global HNSW graph is disabled (m=0) and Qdrant
+        builds one graph per tenant value instead (payload_m), so a search
+        filtered on user_id only walks that user's points. Shared mode always
+        sends m, so switching back from partitioned re-enables the global graph.
+        """
+        options = {}
+        if self.hnsw_ef_construct is not None:
+            options["ef_construct"] = self.hnsw_ef_construct
+        if self.hnsw_on_disk is not None:
+            options["on_disk"] = self.hnsw_on_disk
+        if tenant_mode == "partitioned":
+            options["payload_m"] = self.hnsw_m or 16
+            options["m"] = 0
+        else:
+            options["m"] = self.hnsw_m or 16
+        return HnswConfigDiff(**options)
+
+    def search_params(self) -> Optional[SearchParams]:
+        options = {}
+        if self.hnsw_ef_search is not None:
+            options["hnsw_ef"] = self.hnsw_ef_search
+        if self.quantization != "none":
+            options["quantization"] = QuantizationSearchParams(
+                rescore=self.rescore,
+                oversampling=self.oversampling
+            )
+        return SearchParams(**options) if options else None
+
+
 class QdrantRepository:
-    def __init__(self, qdrant_client: QdrantDBClient):
+    def __init__(
+        self,
+        qdrant_client: QdrantDBClient,
+        upsert_batch_size: int = 128,
+        upsert_parallelism: int = 4,
+        upsert_wait: bool = True,
+        upsert_max_retries: int = 3,
+        upsert_retry_backoff: float = 0.5,
+        tenant_mode: str = "shared",
+        layout: Optional[CollectionLayout] = None
+    ):
+        if tenant_mode not in TENANT_MODES:
+            raise ValueError(f"Unknown Qdrant tenant mode '{tenant_mode}', expected one of {TENANT_MODES}")
         self.qdrant_client = qdrant_client
         self.collection_name = qdrant_client.collection_name
         self.client = qdrant_client.get_client()
+        self.async_client = qdrant_client.get_async_client()
+        self.upsert_batch_size = upsert_batch_size
+        self.upsert_parallelism = upsert_parallelism
+        self.upsert_wait = upsert_wait
+        self.upsert_max_retries = upsert_max_retries
+        self.upsert_retry_backoff = upsert_retry_backoff
+        self.tenant_mode = tenant_mode
+        self.layout = layout or CollectionLayout()
         self._ensure_collection_exists()
+        self._ensure_payload_indexes()
+
+    def resolve_collection(self) -> Tuple[str, bool]:
+        """Physical collection behind 'collection_name' and whether the name is an alias."""
+        for alias in self.client.get_aliases().aliases:
+            if alias.alias_name == self.collection_name:
+                return alias.collection_name, True
+        return self.collection_name, False
 
     def _ensure_collection_exists(self):
-        collections = self.client.get_collections().collections
-        collection_names = [c.name for c in collections]
-        if self.collection_name not in collection_names:
-            logger.info(f"Creating Qdrant collection '{self.collection_name}' with vector size 1024")
-            self.client.create_collection(
-                collection_name=self.collection_name,
-                vectors_config=VectorParams(
-                    size=1024,
-                    distance=Distance.COSINE
-                )
+        physical, via_alias = self.resolve_collection()
+        if not via_alias:
+            collection_names = [c.name for c in self.client.get_collections().collections]
+            if physical not in collection_names:
+                # The configured name is always an alias, so layout migrations
+                # are atomic alias swaps
+                physical = f"{self.collection_name}_{int(time.time())}"
+                self.create_collection(physical)
+                self.client.update_collection_aliases(change_aliases_operations=[
+                    CreateAliasOperation(
+                        create_alias=CreateAlias(collection_name=physical, alias_name=self.collection_name)
+                    )
+                ])
+                logger.info(f"'{self.collection_name}' is an alias of '{physical}'")
+                return
+            logger.warning(
+                f"'{self.collection_name}' is a plain collection; run "
+                f"'python -m app.scripts.migrate_collection --convert-plain' once to put it behind an alias"
+            )
+
+        config = self.client.get_collection(physical).config
+        vectors = config.params.vectors
+        existing_size = getattr(vectors, "size", None)
+        if existing_size is not None and existing_size != self.layout.vector_size:
+            raise ValueError(
+                f"Qdrant collection '{self.collection_name}' holds {existing_size}-d vectors but the "
+                f"embedding backend produces {self.layout.vector_size}-d ones; point QDRANT_COLLECTION "
+                f"at a new collection and re-ingest"
+            )
+        # Switching tenant mode either way changes the graph layout
+        hnsw = self.layout.hnsw_config(self.tenant_mode)
+        current = config.hnsw_config
+        if current.m != hnsw.m or (hnsw.payload_m is not None and current.payload_m != hnsw.payload_m):
+            logger.info(f"Updating HNSW config of '{self.collection_name}' for tenant mode '{self.tenant_mode}'")
+            self.client.update_collection(
+                collection_name=physical,
+                hnsw_config=hnsw
+            )
+
+    def create_collection(self, collection_name: str):
+        """Create a physical collection with the configured layout and payload indexes."""
+        logger.info(
+            f"Creating Qdrant collection '{collection_name}' with vector size {self.layout.vector_size} "
+            f"(quantization={self.layout.quantization}, on_disk={self.layout.on_disk})"
+        )
+        self.client.create_collection(
+            collection_name=collection_name,
+            vectors_config=self.layout.vectors_config(),
+            hnsw_config=self.layout.hnsw_config(self.tenant_mode),
+            quantization_config=self.layout.quantization_config()
+        )
+        self._ensure_payload_indexes(collection_name)
+
+    def _ensure_payload_indexes(self, collection_name: Optional[str] = None):
+        """Create missing keyword indexes and migrate the tenant flag on user_id."""
+        collection_name = collection_name or self.resolve_collection()[0]
+        payload_schema = self.client.get_collection(collection_name).payload_schema or {}
+        for field in PAYLOAD_INDEX_FIELDS:
+            is_tenant = field == TENANT_FIELD and self.tenant_mode == "partitioned"
+            existing = payload_schema.get(field)
+            if existing is not None:
+                params = getattr(existing, "params", None)
+                if bool(getattr(params, "is_tenant", False)) == is_tenant:
+                    continue
+                logger.info(f"Recreating payload index '{field}' (is_tenant={is_tenant})")
+                self.client.delete_payload_index(collection_name, field_name=field)
+            else:
+                logger.info(f"Creating keyword payload index '{field}' on '{collection_name}'")
+            self.client.create_payload_index(
+                collection_name=collection_name,
+                field_name=field,
+                field_schema=KeywordIndexParams(type=KeywordIndexType.KEYWORD, is_tenant=is_tenant),
+                wait=True
             )
 
-    def insert_vectors(self, embeddings, payloads, file_id: Optional[str] = None):
+    async def insert_vectors(
+        self,
+        embeddings,
+        payloads,
+        file_id: Optional[str] = None,
+        wait: Optional[bool] = None,
+        ids: Optional[List[str]] = None
+    ):
+        """
+        Upsert vectors in batches of 'upsert_batch_size' with up to
+        'upsert_parallelism' requests in flight. Only batches that fail are
+        retried. With wait=False Qdrant acknowledges before indexing finishes.
+        'ids' gives each point its id; random ids are used when omitted.
+        """
+        wait = self.upsert_wait if wait is None else wait
         logger.info("Inserting %d vectors into Qdrant...", len(embeddings))
-        try:
-            points = [
-                PointStruct(
-                    id=str(uuid.uuid4()),
-                    vector=embedding,
-                    payload={**payload, "file_id": file_id} if file_id is not None else payload
+        points = [
+            PointStruct(
+                id=ids[i] if ids is not None else str(uuid.uuid4()),
+                vector=embedding,
+                payload={**payload, "file_id": file_id} if file_id is not None else payload
+            )
+            for i, (embedding, payload) in enumerate(zip(embeddings, payloads))
+        ]
+        batches = [
+            points[start:start + self.upsert_batch_size]
+            for start in range(0, len(points), self.upsert_batch_size)
+        ]
+        semaphore = asyncio.Semaphore(self.upsert_parallelism)
+
+        async def upsert_batch(batch: List[PointStruct]):
+            async with semaphore:
+                await self.async_client.upsert(
+                    collection_name=self.collection_name,
+                    points=batch,
+                    wait=wait
                 )
-                for embedding, payload in zip(embeddings, payloads)
-            ]
-            self.client.upsert(
-                collection_name=self.collection_name,
-                points=points
+
+        pending = list(range(len(batches)))
+        attempt = 0
+        while pending:
+            results = await asyncio.gather(
+                *[upsert_batch(batches[index]) for index in pending],
+                return_exceptions=True
             )
-            logger.info("Successfully inserted vectors into Qdrant.")
-        except Exception as e:
-            logger.error(f"Failed to insert vectors into Qdrant: {e}")
-            raise
+            failed = [(index, result) for index, result in zip(pending, results) if isinstance(result, Exception)]
+            if not failed:
+                break
+            if attempt >= self.upsert_max_retries:
+                logger.error(f"Failed to insert vectors into Qdrant: {failed[0][1]}")
+                raise failed[0][1]
+            attempt += 1
+            logger.warning(
+                "%d of %d upsert batches failed (%s), retry %d/%d",
+                len(failed), len(batches), failed[0][1], attempt, self.upsert_max_retries
+            )
+            await asyncio.sleep(self.upsert_retry_backoff * (2 ** (attempt - 1)))
+            pending = [index for index, _ in failed]
+
+        logger.info("Successfully inserted vectors into Qdrant in %d batches.", len(batches))
 
     def delete_collection(self):
         """Deletes the entire Qdrant collection (use with caution)."""
         try:
-            self.client.delete_collection(collection_name=self.collection_name)
-            logger.info(f"Deleted Qdrant collection '{self.collection_name}'")
+            physical, _ = self.resolve_collection()
+            # Deleting the collection also drops its aliases
+            self.client.delete_collection(collection_name=physical)
+            logger.info(f"Deleted Qdrant collection '{physical}'")
         except Exception as e:
             logger.error(f"Error deleting Qdrant collection: {e}")
             raise
 
-    def delete_vectors(self, q_filter: Filter):
+    async def delete_vectors(self, q_filter: Filter):
         """Deletes only the points matching the provided filter."""
         try:
-            self.client.delete(
+            await self.async_client.delete(
                 collection_name=self.collection_name,
                 points_selector=q_filter
             )
@@ -74,29 +353,139 @@ class QdrantRepository:
             logger.error(f"Error deleting filtered vectors in Qdrant: {e}")
             raise
 
-    def search_vectors(self, query_vector: List[float], top_k: int = 5, file_id: Optional[str] = None):
+    async def get_file_owners(self, q_filter: Filter) -> Dict[str, str]:
+        """Map file_id to user_id for the files with points matching the filter."""
+        owners = {}
+        offset = None
+        while True:
+            points, offset = await self.async_client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=q_filter,
+                limit=1000,
+                offset=offset,
+                with_payload=["file_id", "user_id"],
+                with_vectors=False
+            )
+            for point in points:
+                payload = point.payload or {}
+                if payload.get("file_id") and payload.get("user_id"):
+                    owners[str(payload["file_id"])] = str(payload["user_id"])
+            if offset is None:
+                return owners
+
+    async def get_point_ids(self, file_id: str) -> Set[str]:
+        """Return the ids of every point stored for a file."""
+        ids = set()
+        offset = None
+        while True:
+            points, offset = await self.async_client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=file_filter(file_id),
+                limit=1000,
+                offset=offset,
+                with_payload=False,
+                with_vectors=False
+            )
+            ids.update(str(point.id) for point in points)
+            if offset is None:
+                return ids
+
+    async def delete_points(self, ids: List[str]):
+        """Deletes points by id."""
+        if not ids:
+            return
+        try:
+            for start in range(0, len(ids), self.upsert_batch_size):
+                await self.async_client.delete(
+                    collection_name=self.collection_name,
+                    points_selector=PointIdsList(points=ids[start:start + self.upsert_batch_size]),
+                    wait=self.upsert_wait
+                )
+            logger.info(f"Deleted {len(ids)} points from Qdrant")
+        except Exception as e:
+            logger.error(f"Error deleting points in Qdrant: {e}")
+            raise
+
+    async def set_file_payload(self, file_id: str, payload: dict):
+        """Overwrites the given payload keys on every point of a file."""
+        await self.async_client.set_payload(
+            collection_name=self.collection_name,
+            payload=payload,
+            points=file_filter(file_id)
+        )
+
+    async def search_vectors(
+        self,
+        query_vector: List[float],
+        top_k: int = 5,
+        file_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+        payload_fields: Optional[List[str]] = None
+    ):
+        """
+        Search scoped to the user and/or file. 'payload_fields' limits the
+        payload keys returned (all when None); vectors are never fetched.
+        """
+        if self.tenant_mode == "partitioned" and not user_id:
+            raise ValueError("user_id is required to search a partitioned collection")
         try:
             logger.info(f"Searching top {top_k} vectors from Qdrant...")
 
-            q_filter = None
-            if file_id:
-                q_filter = Filter(
-                    must=[
-                        FieldCondition(
-                            key="file_id",
-                            match=MatchValue(value=file_id)
-                        )
-                    ]
-                )
+            q_filter = scope_filter(file_id=file_id, user_id=user_id)
 
-            results = self.client.search(
+            response = await self.async_client.query_points(
                 collection_name=self.collection_name,
-                query_vector=query_vector,
+                query=query_vector,
                 limit=top_k,
-                query_filter=q_filter
+                query_filter=q_filter,
+                search_params=self.layout.search_params(),
+                with_payload=payload_fields if payload_fields is not None else True,
+                with_vectors=False
             )
-            return results
+            return response.points
 
         except Exception as e:
             logger.error(f"Error searching vectors in Qdrant: {e}")
             raise
+
+    async def search_vectors_batch(
+        self,
+        searches: List[dict],
+        top_k: int = 5,
+        user_id: Optional[str] = None,
+        payload_fields: Optional[List[str]] = None
+    ) -> list:
+        """
+        Run several searches in one Qdrant request. Each search is a dict with
+        "vector" and optional "file_id" / "file_ids"; all are scoped to user_id.
+        Returns one hit list per search, in order.
+        """
+        if self.tenant_mode == "partitioned" and not user_id:
+            raise ValueError("user_id is required to search a partitioned collection")
+        if not searches:
+            return []
+        requests = [
+            QueryRequest(
+                query=search["vector"],
+                filter=scope_filter(
+                    file_id=search.get("file_id"),
+                    user_id=user_id,
+                    file_ids=search.get("file_ids")
+                ),
+                limit=top_k,
+                params=self.layout.search_params(),
+                with_payload=payload_fields if payload_fields is not None else True,
+                with_vector=False
+            )
+            for search in searches
+        ]
+        try:
+            logger.info(f"Running {len(requests)} batched searches (top {top_k}) in Qdrant...")
+            responses = await self.async_client.query_batch_points(
+                collection_name=self.collection_name,
+                requests=requests
+            )
+            return [response.points for response in responses]
+        except Exception as e:
+            logger.error(f"Error running batched search in Qdrant: {e}")
+            raise
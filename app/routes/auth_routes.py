@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
+from pymongo.errors import DuplicateKeyError
 from app.models.user import User
-from app.security.hashing import hash_password, verify_password
 from app.utils.jwt_handler import create_access_token
 from app.container.core_container import container
 
@@ -19,11 +19,16 @@ async def register(user: User):
     if existing:
         raise HTTPException(status_code=400, detail="Username already exists")
 
-    hashed = hash_password(user.password)
+    hashed = await container.password_hasher.hash(user.password)
     user_dict = user.dict()
     user_dict["password"] = hashed
 
-    await container.mongo_repository.create_user(user_dict)
+    try:
+        await container.mongo_repository.create_user(user_dict)
+    except DuplicateKeyError:
+        # A concurrent registration took the username after the check above
+        raise HTTPException(status_code=400, detail="Username already exists")
+    container.user_cache.invalidate(user.username)
     return {"message": "User registered successfully"}
 
 
@@ -31,7 +36,9 @@ async def register(user: User):
 async def login(data: LoginRequest):
     user = await container.mongo_repository.get_user_by_username(data.username)
 
-    if not user or not verify_password(data.password, user["password"]):
+    valid = bool(user) and await container.password_hasher.verify(data.password, user["password"])
+    container.password_hasher.record_login(valid)
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid username or password")
 
     token = create_access_token(
@@ -1,56 +1,113 @@
-from fastapi import APIRouter, UploadFile, File, Depends
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Query
+from bson import ObjectId
+from typing import Optional
 from tempfile import NamedTemporaryFile
+import aiofiles
 import logging
+import os
 
 from app.container.core_container import container
+from app.core.config import settings
 from app.security.deps import get_current_user
+from app.services.ingestion_jobs import IngestionQueueFullError, IngestionJobConflictError
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-@router.post("/upload")
+@router.post("/upload", status_code=202)
 async def upload_file(
     file: UploadFile = File(...),
+    file_id: Optional[str] = Query(None, description="Existing file ID to replace with this new version"),
     user: dict = Depends(get_current_user)
 ):
     """
     Handles PDF file uploads for the authenticated user.
+    The file is queued for background ingestion; poll
+    /files/{file_id}/status for progress. Passing an existing file_id
+    re-ingests incrementally: only changed chunks are embedded.
     """
     username = user.get("sub")
     user_id = user.get("user_id")
     logger.info("Received file upload from user: %s (ID: %s)", username, user_id)
 
+    if file_id:
+        try:
+            ObjectId(file_id)
+        except Exception:
+            raise HTTPException(status_code=400, detail="Invalid file ID format")
+        existing = await container.mongo_repository.get_file_by_id(file_id)
+        if not existing or str(existing.get("user_id")) != str(user_id):
+            raise HTTPException(status_code=404, detail="File not found")
+
     with NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-        tmp.write(await file.read())
         tmp_path = tmp.name
+    # Stream to disk in blocks instead of reading the whole upload into memory
+    async with aiofiles.open(tmp_path, "wb") as out:
+        while True:
+            block = await file.read(settings.UPLOAD_READ_BLOCK_SIZE)
+            if not block:
+                break
+            await out.write(block)
     logger.debug("Temporary file saved at: %s", tmp_path)
 
-    file_id = await container.file_processing_service.process_upload(
-        tmp_path,
-        file.filename,
-        str(user_id),
-        username
-    )
+    job = None
+    try:
+        job = await container.ingestion_job_service.submit(
+            tmp_path,
+            file.filename,
+            str(user_id),
+            username,
+            file_id=file_id
+        )
+    except IngestionQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except IngestionJobConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    finally:
+        # Once queued, the worker owns the temp file and removes it when done
+        if job is None:
+            os.remove(tmp_path)
 
-    logger.info("File processed successfully for user: %s, file_id: %s", username, file_id)
+    logger.info("File queued for processing for user: %s, file_id: %s", username, job["file_id"])
     return {
-        "message": "File uploaded and processed successfully",
-        "file_id": str(file_id)
+        "message": "File uploaded and queued for processing",
+        "file_id": job["file_id"],
+        "status": job["status"]
     }
 
 
+@router.get("/{file_id}/status")
+async def get_file_status(file_id: str, current_user: dict = Depends(get_current_user)):
+    """
+    Reports the ingestion stage and progress of an uploaded file.
+    """
+    job = await container.ingestion_job_service.get_status(file_id)
+    if not job or job["user_id"] != current_user["user_id"]:
+        raise HTTPException(status_code=404, detail="File not found")
+    return job
+
 
 @router.get("/files")
-async def get_all_files_metadata(current_user: dict = Depends(get_current_user)):
+async def get_all_files_metadata(
+    limit: int = Query(settings.FILES_PAGE_SIZE, ge=1, le=settings.FILES_MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    current_user: dict = Depends(get_current_user)
+):
     user_id = current_user["user_id"]
     username = current_user["sub"]  # username is stored in 'sub'
 
-    files_metadata = await container.mongo_repository.get_all_files_metadata(user_id)
+    if cursor is not None and not ObjectId.is_valid(cursor):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    files_metadata, next_cursor = await container.mongo_repository.get_all_files_metadata(
+        user_id, limit=limit, after=cursor
+    )
 
     return {
         "owner": {
             "user_id": user_id,
             "username": username
         },
-        "files": files_metadata
+        "files": files_metadata,
+        "next_cursor": next_cursor
     }
\ No newline at end of file
@@ -0,0 +1,47 @@
+from fastapi import APIRouter, Depends
+from app.security.deps import get_current_user
+from app.container.core_container import container
+
+router = APIRouter()
+
+
+@router.get("/embeddings")
+async def embedding_metrics(current_user: dict = Depends(get_current_user)):
+    """
+    Per-batch latency and throughput of the embedding scheduler,
+    plus embedding cache hit/miss counters.
+    """
+    return {
+        "scheduler": container.embedding_scheduler.get_stats(),
+        "cache": container.embedding_cache.get_stats(),
+    }
+
+
+@router.get("/search-cache")
+async def search_cache_metrics(current_user: dict = Depends(get_current_user)):
+    """
+    Hit/miss counters and memory use of the query embedding and result caches.
+    """
+    return container.query_cache.get_stats()
+
+
+@router.get("/answer-cache")
+async def answer_cache_metrics(current_user: dict = Depends(get_current_user)):
+    """
+    Exact and semantic hit counters of the LLM answer cache.
+    """
+    if container.answer_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **container.answer_cache.get_stats()}
+
+
+@router.get("/auth")
+async def auth_metrics(current_user: dict = Depends(get_current_user)):
+    """
+    Login rate and bcrypt latency, plus hit/miss counters of the user
+    cache behind get_current_user.
+    """
+    return {
+        "logins": container.password_hasher.get_stats(),
+        "user_cache": container.user_cache.get_stats(),
+    }
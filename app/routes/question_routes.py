@@ -1,20 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
 from app.security.deps import get_current_user
 from app.container.core_container import container
 from app.models.user import User
+import json
 
 router = APIRouter()
 
 class QuestionRequest(BaseModel):
     question: str
     file_id: str   
-    prompt_name: str
+    # Omit to use the prompt for the question's language (PROMPT_BY_LANGUAGE)
+    prompt_name: Optional[str] = None
 @router.post("/ask")
 async def ask_question(request: QuestionRequest, current_user: dict = Depends(get_current_user)):
     result = await container.llm_search_service.answer_question(
-        user_id=current_user["sub"],
+        user_id=current_user["user_id"],
         question=request.question,
         file_id=request.file_id,
         prompt_name=request.prompt_name, 
@@ -26,3 +29,36 @@ async def ask_question(request: QuestionRequest, current_user: dict = Depends(ge
 
     return result
 
+
+@router.post("/ask/stream")
+async def ask_question_stream(
+    request: QuestionRequest,
+    http_request: Request,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Server-Sent Events variant of /ask: a "sources" event with the retrieved
+    passages, then one "token" event per generated text delta, then "done".
+    """
+    events = container.llm_search_service.stream_answer(
+        user_id=current_user["user_id"],
+        question=request.question,
+        file_id=request.file_id,
+        prompt_name=request.prompt_name,
+    )
+
+    async def event_stream():
+        try:
+            async for event, data in events:
+                if await http_request.is_disconnected():
+                    break
+                yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+        finally:
+            # Stops generation upstream when the client goes away
+            await events.aclose()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,14 +1,29 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
 from bson import ObjectId
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+from app.core.config import settings
+from app.models.search import (
+    BatchSearchResponse,
+    SearchResponse,
+    resolve_payload_fields,
+    serialize_hits,
+)
 from app.security.deps import get_current_user
 from app.container.core_container import container
 
 router = APIRouter()
 
-@router.get("/ask")
+@router.get("/ask", response_model=SearchResponse, response_class=ORJSONResponse)
 async def semantic_search_route(
     query: str = Query(..., description="Search query text"),
     file_id: str = Query(None, description="Optional MongoDB file ID to filter results"),
+    mode: Optional[Literal["hybrid", "dense", "lexical"]] = Query(
+        None, description="Retrieval mode; defaults to SEARCH_DEFAULT_MODE"
+    ),
+    fields: Optional[str] = Query(None, description="Comma-separated payload fields to return"),
+    include_text: bool = Query(True, description="Include the chunk text"),
     current_user: dict = Depends(get_current_user)
 ):
     if file_id:
@@ -17,12 +32,70 @@ async def semantic_search_route(
         except Exception:
             raise HTTPException(status_code=400, detail="Invalid file ID format")
 
+    payload_fields = resolve_payload_fields(fields, include_text)
     try:
         results = await container.semantic_search_service.search(
             query=query,
-            username=current_user["sub"],  # <-- change here
-            file_id=file_id
+            user_id=current_user["user_id"],
+            file_id=file_id,
+            mode=mode,
+            payload_fields=payload_fields
         )
-        return {"matches": results}
+        return ORJSONResponse({"matches": serialize_hits(results, payload_fields)})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Semantic search failed: {str(e)}")
+
+
+class BatchSearchRequest(BaseModel):
+    queries: List[str] = Field(..., min_length=1)
+    file_ids: Optional[List[str]] = Field(None, description="Files to search; omit for all of your files")
+    top_k: int = Field(5, ge=1, le=100)
+    fields: Optional[List[str]] = Field(None, description="Payload fields to return")
+    include_text: bool = True
+
+
+@router.post("/batch", response_model=BatchSearchResponse, response_class=ORJSONResponse)
+async def batch_search_route(
+    request: BatchSearchRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Many queries over many files in one round trip, grouped per query and per file.
+    """
+    if len(request.queries) > settings.BATCH_SEARCH_MAX_QUERIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.BATCH_SEARCH_MAX_QUERIES} queries per batch"
+        )
+    file_ids = list(dict.fromkeys(request.file_ids or []))
+    if any(not ObjectId.is_valid(file_id) for file_id in file_ids):
+        raise HTTPException(status_code=400, detail="Invalid file ID format")
+    if len(request.queries) * max(len(file_ids), 1) > settings.BATCH_SEARCH_MAX_REQUESTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.BATCH_SEARCH_MAX_REQUESTS} query/file combinations per batch"
+        )
+
+    payload_fields = resolve_payload_fields(
+        ",".join(request.fields) if request.fields else None, request.include_text
+    )
+    try:
+        results = await container.semantic_search_service.search_batch(
+            queries=request.queries,
+            user_id=current_user["user_id"],
+            file_ids=file_ids or None,
+            top_k=request.top_k,
+            payload_fields=payload_fields
+        )
+        return ORJSONResponse({"results": [
+            {
+                "query": result["query"],
+                "files": {
+                    str(file_id): serialize_hits(hits, payload_fields)
+                    for file_id, hits in result["files"].items()
+                },
+            }
+            for result in results
+        ]})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch search failed: {str(e)}")
@@ -0,0 +1,334 @@
+"""
+Rebuild the Qdrant collection with the layout configured in Settings
+(quantization, on-disk vectors, HNSW parameters) without downtime.
+
+QDRANT_COLLECTION is an alias of a physical collection. Points are copied
+into a new physical collection, which is then re-synced with the source:
+both are scrolled in id order and compared by payload hash, so new and
+re-payloaded points are copied and deleted ones removed without holding
+either collection in memory. The alias is then swapped in one atomic
+operation. Ingestion keeps running throughout: writes that reached the
+old collection after the last sync pass are applied to the new one by a
+final catch-up pass right after the swap.
+
+Collections created before the app served QDRANT_COLLECTION through an
+alias are plain collections. Converting one is a one-off maintenance step,
+run with --convert-plain while ingestion is stopped: a collection can't
+share its name with an alias and Qdrant can't drop one and create the
+other atomically, so searches fail for the moment between the two calls.
+
+Usage:
+    python -m app.scripts.migrate_collection [--batch-size 256] [--sync-passes 3] [--keep-old]
+    python -m app.scripts.migrate_collection --convert-plain
+"""
+import argparse
+import hashlib
+import json
+import logging
+import tempfile
+import time
+from typing import Iterable, Iterator, List, Optional, TextIO, Tuple, Union
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import (
+    CreateAlias,
+    CreateAliasOperation,
+    DeleteAlias,
+    DeleteAliasOperation,
+    PointIdsList,
+    PointStruct
+)
+
+from app.container.core_container import container
+from app.repositories.qdrant_repository import QdrantRepository
+
+logger = logging.getLogger(__name__)
+
+PointId = Union[int, str]
+
+
+def id_order(point_id: PointId) -> Tuple:
+    """Qdrant's scroll order: integer ids first, then UUIDs by value."""
+    if isinstance(point_id, int):
+        return (0, point_id, "")
+    return (1, 0, str(point_id).lower())
+
+
+def payload_digest(payload: Optional[dict]) -> str:
+    encoded = json.dumps(payload or {}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def scroll_digests(client: QdrantClient, collection_name: str, batch_size: int) -> Iterator[Tuple[PointId, str]]:
+    """(id, payload hash) of every point, one page in memory at a time."""
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection_name,
+            limit=batch_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=False
+        )
+        for point in points:
+            yield point.id, payload_digest(point.payload)
+        if offset is None:
+            return
+
+
+def read_digests(snapshot: TextIO) -> Iterator[Tuple[PointId, str]]:
+    snapshot.seek(0)
+    for line in snapshot:
+        point_id, digest = json.loads(line)
+        yield point_id, digest
+
+
+def merge_digests(
+    left: Iterable[Tuple[PointId, str]],
+    right: Iterable[Tuple[PointId, str]]
+) -> Iterator[Tuple[PointId, Optional[str], Optional[str]]]:
+    """Walk two id-ordered streams together, yielding (id, left digest, right digest)."""
+    left, right = iter(left), iter(right)
+    a, b = next(left, None), next(right, None)
+    last = None
+    while a is not None or b is not None:
+        if b is None or (a is not None and id_order(a[0]) < id_order(b[0])):
+            item, a = (a[0], a[1], None), next(left, None)
+        elif a is None or id_order(b[0]) < id_order(a[0]):
+            item, b = (b[0], None, b[1]), next(right, None)
+        else:
+            item, a, b = (a[0], a[1], b[1]), next(left, None), next(right, None)
+        key = id_order(item[0])
+        if last is not None and key <= last:
+            raise RuntimeError("Points were not scrolled in id order; cannot compare collections")
+        last = key
+        yield item
+
+
+class PointApplier:
+    """Buffers copies from the source and deletes on the target into batched requests."""
+
+    def __init__(self, client: QdrantClient, source: str, target: str, batch_size: int):
+        self.client = client
+        self.source = source
+        self.target = target
+        self.batch_size = batch_size
+        self.to_copy: List[PointId] = []
+        self.to_delete: List[PointId] = []
+        self.copied = 0
+        self.deleted = 0
+
+    def copy(self, point_id: PointId):
+        self.to_copy.append(point_id)
+        if len(self.to_copy) >= self.batch_size:
+            self._flush_copies()
+
+    def delete(self, point_id: PointId):
+        self.to_delete.append(point_id)
+        if len(self.to_delete) >= self.batch_size:
+            self._flush_deletes()
+
+    def flush(self) -> Tuple[int, int]:
+        self._flush_copies()
+        self._flush_deletes()
+        return self.copied, self.deleted
+
+    def _flush_copies(self):
+        if not self.to_copy:
+            return
+        # Points deleted since they were scrolled simply don't come back
+        points = self.client.retrieve(
+            collection_name=self.source,
+            ids=self.to_copy,
+            with_payload=True,
+            with_vectors=True
+        )
+        if points:
+            upsert_copies(self.client, self.target, points)
+        self.copied += len(points)
+        self.to_copy = []
+
+    def _flush_deletes(self):
+        if not self.to_delete:
+            return
+        self.client.delete(
+            collection_name=self.target,
+            points_selector=PointIdsList(points=self.to_delete),
+            wait=True
+        )
+        self.deleted += len(self.to_delete)
+        self.to_delete = []
+
+
+def upsert_copies(client: QdrantClient, target: str, points: List) -> None:
+    client.upsert(
+        collection_name=target,
+        points=[PointStruct(id=point.id, vector=point.vector, payload=point.payload) for point in points],
+        wait=True
+    )
+
+
+def copy_points(client: QdrantClient, source: str, target: str, batch_size: int) -> int:
+    copied = 0
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=source,
+            limit=batch_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True
+        )
+        if points:
+            upsert_copies(client, target, points)
+            copied += len(points)
+        if offset is None:
+            return copied
+
+
+def sync_points(
+    client: QdrantClient,
+    source: str,
+    target: str,
+    batch_size: int,
+    snapshot: Optional[TextIO] = None
+) -> Tuple[int, int]:
+    """
+    Apply the source's writes since the copy to the target. Point ids hash
+    the chunk content, so an id present in both has the same vector and
+    only payload hashes need comparing. The source's (id, payload hash)
+    pairs are written to 'snapshot' for catch_up. Returns (copied, deleted).
+    """
+    applier = PointApplier(client, source, target, batch_size)
+    source_digests = scroll_digests(client, source, batch_size)
+    target_digests = scroll_digests(client, target, batch_size)
+    for point_id, source_digest, target_digest in merge_digests(source_digests, target_digests):
+        if source_digest is None:
+            applier.delete(point_id)
+            continue
+        if snapshot is not None:
+            snapshot.write(json.dumps([point_id, source_digest]) + "\n")
+        if source_digest != target_digest:
+            applier.copy(point_id)
+    return applier.flush()
+
+
+def catch_up(client: QdrantClient, source: str, target: str, batch_size: int, snapshot: TextIO) -> Tuple[int, int]:
+    """
+    After the swap, apply only what changed in the source since 'snapshot'
+    was taken. Points written to the target after the swap are left alone.
+    """
+    applier = PointApplier(client, source, target, batch_size)
+    current = scroll_digests(client, source, batch_size)
+    for point_id, then, now in merge_digests(read_digests(snapshot), current):
+        if now is None:
+            applier.delete(point_id)
+        elif then != now:
+            applier.copy(point_id)
+    return applier.flush()
+
+
+def migrate(
+    repository: QdrantRepository,
+    batch_size: int = 256,
+    sync_passes: int = 3,
+    grace_seconds: float = 5.0,
+    keep_old: bool = False
+) -> str:
+    client = repository.client
+    name = repository.collection_name
+    source, via_alias = repository.resolve_collection()
+    if not via_alias:
+        raise RuntimeError(f"'{name}' is a plain collection; convert it once with --convert-plain")
+    target = f"{name}_{int(time.time())}"
+
+    repository.create_collection(target)
+    copied = copy_points(client, source, target, batch_size)
+    logger.info(f"Copied {copied} points from '{source}' to '{target}'")
+
+    with tempfile.TemporaryFile("w+", encoding="utf-8") as snapshot:
+        # Each pass only has to apply what was written during the previous one
+        for sync_pass in range(1, sync_passes + 1):
+            snapshot.seek(0)
+            snapshot.truncate()
+            changed, deleted = sync_points(client, source, target, batch_size, snapshot)
+            logger.info(f"Sync pass {sync_pass}: copied {changed} changed points, deleted {deleted} stale points")
+            if changed + deleted < batch_size:
+                break
+
+        client.update_collection_aliases(change_aliases_operations=[
+            DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=name)),
+            CreateAliasOperation(create_alias=CreateAlias(collection_name=target, alias_name=name)),
+        ])
+        logger.info(f"'{name}' now points to '{target}'")
+
+        # Let writes already routed to the old collection land, then apply them
+        time.sleep(grace_seconds)
+        changed, deleted = catch_up(client, source, target, batch_size, snapshot)
+        logger.info(f"Caught up {changed} changed and {deleted} deleted points written during the swap")
+
+    if not keep_old:
+        client.delete_collection(source)
+    return target
+
+
+def convert_plain(repository: QdrantRepository, batch_size: int = 256) -> str:
+    """
+    One-off: copy a plain collection into '<name>_<ts>' and replace it with
+    an alias of the same name. Searches fail between dropping the plain
+    collection and creating the alias, and writes after the sync are lost,
+    so run it with ingestion stopped.
+    """
+    client = repository.client
+    name = repository.collection_name
+    source, via_alias = repository.resolve_collection()
+    if via_alias:
+        raise RuntimeError(f"'{name}' is already an alias of '{source}'")
+    target = f"{name}_{int(time.time())}"
+
+    repository.create_collection(target)
+    copied = copy_points(client, source, target, batch_size)
+    changed, deleted = sync_points(client, source, target, batch_size)
+    logger.info(f"Copied {copied} points, then {changed} changed and {deleted} deleted ones, into '{target}'")
+
+    logger.warning(f"Dropping plain collection '{name}'; it is unavailable until the alias is created")
+    client.delete_collection(source)
+    client.update_collection_aliases(change_aliases_operations=[
+        CreateAliasOperation(create_alias=CreateAlias(collection_name=target, alias_name=name))
+    ])
+    logger.info(f"'{name}' is now an alias of '{target}'")
+    return target
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the Qdrant collection with the configured layout.")
+    parser.add_argument("--batch-size", type=int, default=256, help="Points copied per request")
+    parser.add_argument("--sync-passes", type=int, default=3, help="Most re-sync passes before the swap")
+    parser.add_argument(
+        "--grace-seconds", type=float, default=5.0,
+        help="Wait after the swap for in-flight writes to the old collection"
+    )
+    parser.add_argument("--keep-old", action="store_true", help="Keep the previous collection after the swap")
+    parser.add_argument(
+        "--convert-plain", action="store_true",
+        help="One-off: put a plain collection behind an alias (brief search outage)"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if not isinstance(container.qdrant_repository, QdrantRepository):
+        parser.error("VECTOR_STORE is not 'qdrant'; there is no collection to migrate")
+    if args.convert_plain:
+        convert_plain(container.qdrant_repository, batch_size=args.batch_size)
+        return
+    migrate(
+        container.qdrant_repository,
+        batch_size=args.batch_size,
+        sync_passes=args.sync_passes,
+        grace_seconds=args.grace_seconds,
+        keep_old=args.keep_old
+    )
+
+
+if __name__ == "__main__":
+    main()
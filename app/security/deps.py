@@ -1,3 +1,4 @@
+import time
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
@@ -16,14 +17,17 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         if not user_id or not username:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
-        user = await container.mongo_repository.get_user_by_username(username)
+        issued_at = payload.get("iat")
+        if settings.AUTH_TRUST_TOKEN_SECONDS and issued_at is not None:
+            if time.time() - issued_at <= settings.AUTH_TRUST_TOKEN_SECONDS:
+                # Signed recently enough: skip the user lookup entirely
+                return {"user_id": user_id, "sub": username, "role": payload.get("role", "user")}
+
+        user = await container.user_cache.get(username)
         if not user:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
-        return {
-    "user_id": str(user["_id"]),  # matches token and route
-    "sub": user["username"]
-}
+        return user
     except JWTError:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Could not validate credentials")
 
@@ -1,3 +1,7 @@
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from passlib.context import CryptContext
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -7,3 +11,63 @@ def hash_password(password: str):
 
 def verify_password(plain_password: str, hashed_password: str):
     return pwd_context.verify(plain_password, hashed_password)
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a small dedicated thread pool so password checks never
+    block the event loop, and keeps login counters for the metrics route.
+    The pool size caps how much CPU auth traffic can take from searches.
+    """
+
+    def __init__(self, rounds: int = 12, max_workers: int = 2, rate_window_seconds: float = 60.0):
+        self.context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self.rate_window_seconds = rate_window_seconds
+        self._logins = deque()
+        self.stats = {
+            "hashes": 0,
+            "verifications": 0,
+            "hash_ms_total": 0.0,
+            "verify_ms_total": 0.0,
+            "logins": 0,
+            "login_failures": 0,
+        }
+
+    async def hash(self, password: str) -> str:
+        started = time.perf_counter()
+        hashed = await asyncio.get_running_loop().run_in_executor(self.executor, self.context.hash, password)
+        self.stats["hashes"] += 1
+        self.stats["hash_ms_total"] += (time.perf_counter() - started) * 1000
+        return hashed
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        started = time.perf_counter()
+        valid = await asyncio.get_running_loop().run_in_executor(
+            self.executor, self.context.verify, plain_password, hashed_password
+        )
+        self.stats["verifications"] += 1
+        self.stats["verify_ms_total"] += (time.perf_counter() - started) * 1000
+        return valid
+
+    def record_login(self, success: bool) -> None:
+        self.stats["logins"] += 1
+        if not success:
+            self.stats["login_failures"] += 1
+        self._logins.append(time.monotonic())
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False)
+
+    def get_stats(self) -> dict:
+        cutoff = time.monotonic() - self.rate_window_seconds
+        while self._logins and self._logins[0] < cutoff:
+            self._logins.popleft()
+        hashes = self.stats["hashes"]
+        verifications = self.stats["verifications"]
+        return {
+            **self.stats,
+            "avg_hash_ms": round(self.stats["hash_ms_total"] / hashes, 1) if hashes else None,
+            "avg_verify_ms": round(self.stats["verify_ms_total"] / verifications, 1) if verifications else None,
+            "logins_per_minute": round(len(self._logins) * 60 / self.rate_window_seconds, 1),
+        }
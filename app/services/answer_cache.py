@@ -0,0 +1,153 @@
+import hashlib
+import logging
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.utils.cache import TTLCache
+from app.utils.tokenizer import tokenize
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_question(question: str) -> str:
+    """Case, punctuation and whitespace-insensitive form of a question."""
+    return " ".join(tokenize(question))
+
+
+class AnswerCache:
+    """
+    TTL+LRU cache of LLM answers keyed on (user_id, file_id, prompt_name,
+    normalized question). When a similarity threshold is set, a miss on
+    the exact key falls back to the closest previously answered question
+    in the same scope. Entries for a file are dropped whenever that file's
+    vectors change.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 3600.0,
+        max_entries: int = 2000,
+        similarity_threshold: Optional[float] = None
+    ):
+        self.entries = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.similarity_threshold = similarity_threshold
+        # (user_id, file_id, prompt_name) -> {key: unit question vector}
+        self._vectors: Dict[Tuple, Dict[str, np.ndarray]] = {}
+        # file_id (None for questions over all files) -> answer keys
+        self._file_keys: Dict[Optional[str], Set[str]] = {}
+        # prompt_name -> answer keys, for prompt template edits
+        self._prompt_keys: Dict[str, Set[str]] = {}
+        # Bumped on every invalidation so answers built from stale context aren't stored
+        self.generation = 0
+        self.stats = {
+            "exact_hits": 0,
+            "semantic_hits": 0,
+            "misses": 0,
+            "invalidations": 0,
+        }
+
+    @staticmethod
+    def key(user_id: str, file_id: Optional[str], prompt_name: str, question: str) -> str:
+        digest = hashlib.sha256(normalize_question(question).encode("utf-8")).hexdigest()
+        return f"{user_id}:{file_id}:{prompt_name}:{digest}"
+
+    def get(self, key: str) -> Optional[dict]:
+        answer = self.entries.get(key)
+        if answer is not None:
+            self.stats["exact_hits"] += 1
+        return answer
+
+    def get_similar(
+        self,
+        user_id: str,
+        file_id: Optional[str],
+        prompt_name: str,
+        question_vector: List[float]
+    ) -> Optional[dict]:
+        """Best cached answer whose question is at least 'similarity_threshold' similar."""
+        if self.similarity_threshold is None:
+            self.stats["misses"] += 1
+            return None
+        vectors = self._vectors.get((user_id, file_id, prompt_name))
+        if vectors:
+            # Forget questions whose answers expired or were evicted
+            for stale in [k for k in vectors if k not in self.entries]:
+                del vectors[stale]
+        if not vectors:
+            self.stats["misses"] += 1
+            return None
+
+        keys = list(vectors)
+        matrix = np.stack([vectors[k] for k in keys])
+        similarities = matrix @ self._unit(question_vector)
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.similarity_threshold:
+            self.stats["misses"] += 1
+            return None
+        self.stats["semantic_hits"] += 1
+        logger.debug("Semantic answer cache hit (similarity %.3f)", similarities[best])
+        return self.entries.get(keys[best])
+
+    def set(
+        self,
+        key: str,
+        user_id: str,
+        file_id: Optional[str],
+        prompt_name: str,
+        question_vector: Optional[List[float]],
+        answer: dict,
+        generation: int
+    ) -> None:
+        if generation != self.generation:
+            return
+        self.entries.set(key, answer)
+        for keys in (self._file_keys.setdefault(file_id, set()), self._prompt_keys.setdefault(prompt_name, set())):
+            keys.add(key)
+            if len(keys) > len(self.entries):
+                keys.intersection_update([k for k in keys if k in self.entries])
+        if question_vector is not None and self.similarity_threshold is not None:
+            scope = self._vectors.setdefault((user_id, file_id, prompt_name), {})
+            scope[key] = self._unit(question_vector)
+
+    def invalidate_file(self, file_id: Optional[str]) -> None:
+        """
+        Drop answers grounded in 'file_id' and answers over all of a user's
+        files. A None file_id drops everything.
+        """
+        self.generation += 1
+        self.stats["invalidations"] += 1
+        if file_id is None:
+            self.entries.clear()
+            self._vectors.clear()
+            self._file_keys.clear()
+            self._prompt_keys.clear()
+            return
+        for scope in (file_id, None):
+            for key in self._file_keys.pop(scope, set()):
+                self.entries.pop(key)
+        for scope in [s for s in self._vectors if s[1] in (file_id, None)]:
+            del self._vectors[scope]
+        logger.debug("Invalidated cached answers for file_id %s", file_id)
+
+    def invalidate_prompt(self, prompt_name: str) -> None:
+        """Drop answers produced with an edited or deleted prompt template."""
+        self.generation += 1
+        self.stats["invalidations"] += 1
+        for key in self._prompt_keys.pop(prompt_name, set()):
+            self.entries.pop(key)
+        for scope in [s for s in self._vectors if s[2] == prompt_name]:
+            del self._vectors[scope]
+        logger.debug("Invalidated cached answers for prompt %s", prompt_name)
+
+    def get_stats(self) -> dict:
+        return {
+            **self.stats,
+            "entries": len(self.entries),
+            "similarity_threshold": self.similarity_threshold,
+        }
+
+    @staticmethod
+    def _unit(vector: List[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        return array / (np.linalg.norm(array) + 1e-12)
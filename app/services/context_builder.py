@@ -0,0 +1,133 @@
+import logging
+from typing import Dict, List, Set
+
+from app.services.embedding_cache import normalize_chunk_text
+from app.utils.tokenizer import estimate_tokens, tokenize
+
+logger = logging.getLogger(__name__)
+
+
+def _shingles(text: str, size: int = 3) -> Set[tuple]:
+    tokens = tokenize(text)
+    if len(tokens) < size:
+        return {tuple(tokens)} if tokens else set()
+    return {tuple(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+def _jaccard(left: Set[tuple], right: Set[tuple]) -> float:
+    if not left or not right:
+        return 0.0
+    return len(left & right) / len(left | right)
+
+
+def _overlap_length(left: str, right: str, max_overlap: int) -> int:
+    """Length of the longest suffix of 'left' that is also a prefix of 'right'."""
+    for length in range(min(len(left), len(right), max_overlap), 0, -1):
+        if left.endswith(right[:length]):
+            return length
+    return 0
+
+
+class ContextBuilder:
+    """
+    Turns ranked hits into LLM context: drops exact and near-duplicate
+    chunks, takes chunks best-first until the token budget is used, then
+    merges neighbouring chunk_index ranges of the same file into contiguous
+    passages with the splitter overlap removed.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = 1500,
+        near_duplicate_threshold: float = 0.9,
+        max_overlap_chars: int = 200,
+        separator: str = "\n\n"
+    ):
+        self.token_budget = token_budget
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self.max_overlap_chars = max_overlap_chars
+        self.separator = separator
+
+    def build(self, hits: list) -> dict:
+        selected = []
+        seen_texts = set()
+        seen_shingles: List[Set[tuple]] = []
+        duplicates = 0
+        budget_used = 0
+
+        for rank, hit in enumerate(hits):
+            text = str(hit.payload.get("text", ""))
+            normalized = normalize_chunk_text(text)
+            if not normalized:
+                continue
+            shingles = _shingles(normalized)
+            if normalized in seen_texts or any(
+                _jaccard(shingles, other) >= self.near_duplicate_threshold for other in seen_shingles
+            ):
+                duplicates += 1
+                continue
+            tokens = estimate_tokens(text)
+            if selected and budget_used + tokens > self.token_budget:
+                continue
+            seen_texts.add(normalized)
+            seen_shingles.append(shingles)
+            selected.append((rank, hit, text))
+            budget_used += tokens
+
+        passages = self._merge_neighbours(selected)
+        context = self.separator.join(passage["text"] for passage in passages)
+        tokens_used = estimate_tokens(context)
+        logger.debug(
+            "Built context from %d chunks in %d passages (%d duplicates dropped, %d tokens)",
+            len(selected), len(passages), duplicates, tokens_used
+        )
+        return {
+            "context": context,
+            "tokens_used": tokens_used,
+            "chunks_used": len(selected),
+            "duplicates_dropped": duplicates,
+            "passages": [
+                {key: value for key, value in passage.items() if key != "text"}
+                for passage in passages
+            ],
+        }
+
+    def _merge_neighbours(self, selected: list) -> List[dict]:
+        by_file: Dict[str, list] = {}
+        filenames: Dict[str, str] = {}
+        for rank, hit, text in selected:
+            file_id = str(hit.payload.get("file_id"))
+            filenames.setdefault(file_id, hit.payload.get("filename"))
+            by_file.setdefault(file_id, []).append(
+                (hit.payload.get("chunk_index"), rank, text)
+            )
+
+        passages = []
+        for file_id, chunks in by_file.items():
+            # Chunks without an index can't be placed next to anything
+            indexed = sorted((c for c in chunks if c[0] is not None), key=lambda c: c[0])
+            for chunk_index, rank, text in (c for c in chunks if c[0] is None):
+                passages.append({
+                    "file_id": file_id, "filename": filenames[file_id],
+                    "chunk_start": None, "chunk_end": None, "rank": rank, "text": text
+                })
+
+            current = None
+            for chunk_index, rank, text in indexed:
+                if current is not None and chunk_index == current["chunk_end"] + 1:
+                    overlap = _overlap_length(current["text"], text, self.max_overlap_chars)
+                    joiner = "" if overlap else "\n"
+                    current["text"] = current["text"] + joiner + text[overlap:]
+                    current["chunk_end"] = chunk_index
+                    current["rank"] = min(current["rank"], rank)
+                    continue
+                current = {
+                    "file_id": file_id, "filename": filenames[file_id],
+                    "chunk_start": chunk_index, "chunk_end": chunk_index, "rank": rank, "text": text
+                }
+                passages.append(current)
+
+        passages.sort(key=lambda passage: passage["rank"])
+        for passage in passages:
+            passage["tokens"] = estimate_tokens(passage["text"])
+        return passages
@@ -0,0 +1,103 @@
+import hashlib
+import logging
+import re
+import unicodedata
+from array import array
+from typing import List, Optional
+from app.repositories.embedding_cache_repository import EmbeddingCacheRepository
+from app.utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_chunk_text(text: str) -> str:
+    """Normalize a chunk so whitespace-only edits hash to the same key."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def content_hash(text: str) -> str:
+    """sha256 of the normalized chunk text."""
+    return hashlib.sha256(normalize_chunk_text(text).encode("utf-8")).hexdigest()
+
+
+def embedding_cache_key(model: str, input_type: str, text: str) -> str:
+    return f"{model}:{input_type}:{content_hash(text)}"
+
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding cache: an in-process LRU in front of a
+    persistent Mongo store. Vectors are held as float32 arrays to keep
+    the LRU small.
+    """
+
+    def __init__(
+        self,
+        repository: Optional[EmbeddingCacheRepository] = None,
+        max_entries: int = 10000
+    ):
+        self.repository = repository
+        self.memory = LRUCache(max_entries=max_entries)
+        self.stats = {"memory_hits": 0, "store_hits": 0, "misses": 0, "store_errors": 0}
+
+    async def get_many(self, model: str, input_type: str, texts: List[str]) -> List[Optional[List[float]]]:
+        """Return cached vectors in input order, None where the text is not cached."""
+        keys = [embedding_cache_key(model, input_type, text) for text in texts]
+        found = {}
+        missing = set()
+        for key in keys:
+            if key in found or key in missing:
+                continue
+            vector = self.memory.get(key)
+            if vector is not None:
+                found[key] = vector
+            else:
+                missing.add(key)
+
+        stored = {}
+        if missing and self.repository is not None:
+            try:
+                stored = await self.repository.get_many(list(missing))
+            except Exception as e:
+                self.stats["store_errors"] += 1
+                logger.warning(f"Embedding cache lookup failed: {e}")
+            for key, vector in stored.items():
+                self.memory.set(key, vector)
+            found.update(stored)
+
+        results = []
+        for key in keys:
+            vector = found.get(key)
+            if vector is None:
+                self.stats["misses"] += 1
+                results.append(None)
+                continue
+            self.stats["store_hits" if key in stored else "memory_hits"] += 1
+            results.append(vector.tolist())
+        return results
+
+    async def put_many(self, model: str, input_type: str, texts: List[str], vectors: List[List[float]]) -> None:
+        entries = {}
+        for text, vector in zip(texts, vectors):
+            key = embedding_cache_key(model, input_type, text)
+            packed = array("f", vector)
+            self.memory.set(key, packed)
+            entries[key] = packed
+
+        if self.repository is not None:
+            try:
+                await self.repository.put_many(entries)
+            except Exception as e:
+                self.stats["store_errors"] += 1
+                logger.warning(f"Embedding cache write failed: {e}")
+
+    def get_stats(self) -> dict:
+        hits = self.stats["memory_hits"] + self.stats["store_hits"]
+        lookups = hits + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": round(hits / lookups, 4) if lookups else None,
+            "memory_entries": len(self.memory),
+        }
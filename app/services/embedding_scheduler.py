@@ -0,0 +1,94 @@
+import asyncio
+import logging
+import time
+from typing import List, Optional
+from app.clients.embedding_backend import EmbeddingBackend
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingScheduler:
+    """
+    Splits texts into provider-sized batches, embeds a bounded number of
+    batches concurrently and reassembles the vectors in input order.
+    Each batch is its own provider request, so the client's transient-error
+    retries redo only the batch that failed.
+    """
+
+    def __init__(
+        self,
+        embedding_client: EmbeddingBackend,
+        batch_size: int = 96,
+        max_concurrent_batches: int = 4
+    ):
+        self.embedding_client = embedding_client
+        self.batch_size = batch_size
+        self.semaphore = asyncio.Semaphore(max_concurrent_batches)
+        self.stats = {
+            "runs": 0,
+            "batches": 0,
+            "texts": 0,
+            "batch_failures": 0,
+            "batch_latency_ms_total": 0.0,
+        }
+        self.last_run: dict = {}
+
+    async def embed(self, texts: List[str], input_type: Optional[str] = None) -> List[List[float]]:
+        if not texts:
+            return []
+
+        batches = [
+            texts[start:start + self.batch_size]
+            for start in range(0, len(texts), self.batch_size)
+        ]
+        started = time.perf_counter()
+        results = await asyncio.gather(*[
+            self._embed_batch(index, batch, input_type)
+            for index, batch in enumerate(batches)
+        ])
+        elapsed = time.perf_counter() - started
+
+        embeddings = [vector for vectors, _ in results for vector in vectors]
+        latencies = [round(latency_ms, 1) for _, latency_ms in results]
+        self.stats["runs"] += 1
+        self.last_run = {
+            "texts": len(texts),
+            "batches": len(batches),
+            "elapsed_ms": round(elapsed * 1000, 1),
+            "texts_per_second": round(len(texts) / elapsed, 1) if elapsed > 0 else None,
+            "batch_latency_ms": latencies,
+        }
+        logger.info(
+            "Embedded %d texts in %d batches in %.0f ms (%.1f texts/s)",
+            len(texts), len(batches), elapsed * 1000, len(texts) / elapsed if elapsed > 0 else 0.0
+        )
+        return embeddings
+
+    async def _embed_batch(self, index: int, batch: List[str], input_type: Optional[str]):
+        try:
+            async with self.semaphore:
+                started = time.perf_counter()
+                vectors = await self.embedding_client.embed(batch, input_type=input_type)
+                latency_ms = (time.perf_counter() - started) * 1000
+            if len(vectors) != len(batch):
+                raise ValueError(
+                    f"Provider returned {len(vectors)} embeddings for a batch of {len(batch)}"
+                )
+        except Exception as e:
+            self.stats["batch_failures"] += 1
+            logger.error(f"Embedding batch {index} failed: {e}")
+            raise
+
+        self.stats["batches"] += 1
+        self.stats["texts"] += len(batch)
+        self.stats["batch_latency_ms_total"] += latency_ms
+        logger.debug("Embedding batch %d (%d texts) took %.0f ms", index, len(batch), latency_ms)
+        return vectors, latency_ms
+
+    def get_stats(self) -> dict:
+        batches = self.stats["batches"]
+        return {
+            **self.stats,
+            "avg_batch_latency_ms": round(self.stats["batch_latency_ms_total"] / batches, 1) if batches else None,
+            "last_run": self.last_run,
+        }
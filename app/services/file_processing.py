@@ -1,88 +1,194 @@
 # file_processing.py
 
-import fitz  # PyMuPDF
 import logging
+from typing import Awaitable, Callable, List, Optional
 from app.repositories.mongo_repository import MongoRepository
+from app.services.pdf_extraction import PdfTextExtractor
 from app.services.semantic_search import SemanticSearchService
 from qdrant_client.models import Filter, FieldCondition, MatchValue
 
 logger = logging.getLogger(__name__)
 
+StageCallback = Callable[[str, dict], Awaitable[None]]
+
+
 class FileProcessingService:
     def __init__(
         self, 
         mongo_repository: MongoRepository,
         semantic_search_service: SemanticSearchService,
+        pdf_extractor: PdfTextExtractor,
+        batch_size: int = 256,
     ):
         self.mongo_repository = mongo_repository
         self.semantic_search_service = semantic_search_service
+        self.pdf_extractor = pdf_extractor
+        # Chunks embedded and upserted together; bounds memory per document
+        self.batch_size = batch_size
 
-    def extract_text_from_pdf(self, file_path: str) -> str:
-        """Extract all text from a PDF file."""
-        logger.info(f"Extracting text from PDF: {file_path}")
-        try:
-            doc = fitz.open(file_path)
-            text = "".join([page.get_text() for page in doc])
-            return text.strip()
-        except Exception as e:
-            logger.error(f"Failed to extract text from PDF: {e}")
-            raise
+    async def save_upload(self, file_path: str, file_name: str, user_id: str, username: str):
+        """Save the uploaded file metadata in MongoDB and return its id."""
+        file_id = await self.mongo_repository.save_file(file_path, file_name, user_id, username)
+        logger.info(f"Saved file '{file_name}' content to MongoDB with id {file_id}")
+        return file_id
 
-    async def process_upload(self, file_path: str, file_name: str,user_id: str, username: str):
+    async def process_upload(
+        self,
+        file_path: str,
+        file_name: str,
+        user_id: str,
+        username: str,
+        file_id: Optional[str] = None,
+        on_stage: Optional[StageCallback] = None,
+        incremental: bool = False
+    ):
         """
-        Process a PDF upload:
-        0. Save the file content + metadata in MongoDB (as binary + fields)
-        1. Extract text
-        2. Split into chunks
-        3. Embed chunks
-        4. Store vectors in Qdrant
+        Process a PDF upload as a stream:
+        0. Save the file metadata in MongoDB (skipped when file_id is given)
+        1. Extract text page by page
+        2. Split pages into chunks incrementally, across page boundaries
+        3. Embed chunks in bounded batches
+        4. Store each batch of vectors in Qdrant
+
+        With 'incremental', the file's stored point ids are compared with the
+        ids of the new chunks: only chunks without a stored point are embedded
+        and upserted, and points no longer produced are deleted afterwards.
+
+        'on_stage' is awaited with (stage, details) as the pipeline advances.
         """
         logger.info(f"Starting file upload process for '{file_name}' by user '{username}'")
 
-        # 0. Save the PDF file content + metadata to MongoDB
-        file_id = await self.mongo_repository.save_file(file_path, file_name,user_id ,username)
-        logger.info(f"Saved file '{file_name}' content to MongoDB with id {file_id}")
+        async def report(stage: str, **details):
+            if on_stage is not None:
+                await on_stage(stage, details)
 
-        # 1. Extract raw text from the PDF
-        text = self.extract_text_from_pdf(file_path)
-        if not text:
-            logger.warning("No text extracted from PDF.")
-            raise ValueError("Uploaded PDF contains no extractable text.")
-
-        # 2. Split text into smaller chunks
-        chunks = self.semantic_search_service.split_text(text)
-        if not chunks:
-            logger.warning("No chunks created from text.")
-            raise ValueError("Failed to split text into chunks.")
-
-        # 3. Embed chunks asynchronously
-        embeddings = await self.semantic_search_service.embed_texts(chunks)
-        if not embeddings:
-            logger.warning("No embeddings generated.")
-            raise ValueError("Failed to embed text chunks.")
-
-        # 4. Store embeddings and chunks in Qdrant
-        metadata = {"username": username, "user_id": user_id, "filename": file_name}  # metadata without file_id
-        chunks_payloads = [{"text": chunk, **metadata, "file_id": str(file_id)} for chunk in chunks]
-
-        await self.semantic_search_service.store_vectors(
-            embeddings, 
-            chunks_payloads, 
-            file_id=str(file_id),
-            metadata=metadata
-        )
-        return file_id
+        # 0. Save the PDF file metadata to MongoDB
+        if file_id is None:
+            file_id = await self.save_upload(file_path, file_name, user_id, username)
+        file_id = str(file_id)
+        metadata = {"username": username, "user_id": user_id, "filename": file_name}
+
+        stored_ids = set()
+        if incremental:
+            stored_ids = await self.semantic_search_service.get_stored_point_ids(file_id)
+            logger.info(f"Incremental re-ingest of {file_id}: {len(stored_ids)} points already stored")
+
+        page_count = await self.pdf_extractor.page_count(file_path)
+        await report("extracting", pages=page_count)
 
-# New method to get all file IDs
-async def get_all_file_ids(self) -> list:
-    """
-    Return a list of all file IDs and their associated user IDs stored in MongoDB.
-    """
-    try:
-        file_info_list = await self.mongo_repository.get_all_file_ids()  
-        # Expecting a list of dicts: [{"file_id": "...", "user_id": "..."}, ...]
-        return file_info_list
-    except Exception as e:
-        logger.error(f"Failed to get all file IDs and user IDs: {e}")
-        raise
+        splitter = self.semantic_search_service.new_splitter()
+        batch: List[str] = []
+        indexed = 0
+        unchanged = 0
+        pages_done = 0
+        extraction_timings: List[dict] = []
+        seen_ids = set()
+        # Every chunk, changed or not, is streamed to the new lexical index
+        lexical_index = await self.semantic_search_service.open_lexical_index(user_id, file_id)
 
+        async def flush_batch():
+            nonlocal batch, indexed, unchanged
+            progress = pages_done / page_count if page_count else 0.0
+            details = {
+                "pages": page_count,
+                "pages_done": pages_done,
+                "chunks_indexed": indexed,
+                "chunks_unchanged": unchanged,
+                "extraction_ranges": list(extraction_timings),
+                "chunking": splitter.get_stats(),
+            }
+
+            point_ids = []
+            lexical_docs = []
+            for chunk_index, chunk in enumerate(batch, start=indexed):
+                point_id, payload = self.semantic_search_service.build_chunk_point(
+                    file_id, chunk_index, chunk, metadata
+                )
+                point_ids.append(point_id)
+                lexical_docs.append((point_id, chunk, payload))
+            await self.semantic_search_service.write_lexical_index(lexical_index, lexical_docs)
+            seen_ids.update(point_ids)
+            changed = [
+                (chunk_index, chunk)
+                for chunk_index, (chunk, point_id) in enumerate(zip(batch, point_ids), start=indexed)
+                if point_id not in stored_ids
+            ]
+            unchanged += len(batch) - len(changed)
+            indexed += len(batch)
+            batch = []
+            if not changed:
+                return
+            chunk_indexes = [chunk_index for chunk_index, _ in changed]
+            chunks = [chunk for _, chunk in changed]
+
+            # 3. Embed the batch
+            await report("embedding", progress=progress, **details)
+            embeddings = await self.semantic_search_service.embed_texts(chunks)
+            if len(embeddings) != len(chunks):
+                raise ValueError("Failed to embed text chunks.")
+
+            # 4. Store embeddings and chunks in Qdrant
+            await report("indexing", progress=progress, **details)
+            await self.semantic_search_service.store_vectors(
+                embeddings,
+                chunks,
+                file_id=file_id,
+                metadata=metadata,
+                chunk_indexes=chunk_indexes
+            )
+
+        try:
+            # 1-2. Extract and split page by page
+            async for page_text in self.pdf_extractor.iter_pages(file_path, page_count, extraction_timings):
+                pages_done += 1
+                batch.extend(splitter.feed(page_text))
+                while len(batch) >= self.batch_size:
+                    overflow = batch[self.batch_size:]
+                    batch = batch[:self.batch_size]
+                    await flush_batch()
+                    batch = overflow
+
+            batch.extend(splitter.flush())
+            if batch:
+                await flush_batch()
+
+            if indexed == 0:
+                logger.warning("No text extracted from PDF.")
+                raise ValueError("Uploaded PDF contains no extractable text.")
+
+            if incremental:
+                stale_ids = list(stored_ids - seen_ids)
+                await self.semantic_search_service.delete_points(file_id, stale_ids)
+                if unchanged:
+                    # Unchanged points keep their vectors but pick up new metadata
+                    await self.semantic_search_service.update_file_payload(file_id, metadata)
+                await self.mongo_repository.update_file(file_id, {"filename": file_name})
+                logger.info(
+                    f"Re-ingested {file_id}: {indexed - unchanged} chunks upserted, "
+                    f"{unchanged} unchanged, {len(stale_ids)} stale points deleted"
+                )
+        except BaseException:
+            await self.semantic_search_service.abort_lexical_index(lexical_index)
+            raise
+        await self.semantic_search_service.commit_lexical_index(user_id, file_id, lexical_index)
+
+        chunk_stats = splitter.get_stats()
+        await report(
+            "indexing",
+            progress=1.0,
+            pages=page_count,
+            pages_done=pages_done,
+            chunks_indexed=indexed,
+            chunks_unchanged=unchanged,
+            extraction_ranges=list(extraction_timings),
+            chunking=chunk_stats
+        )
+
+        extraction_ms = sum(timing["ms"] for timing in extraction_timings)
+        logger.info(
+            f"Indexed {indexed} chunks from {page_count} pages of '{file_name}' "
+            f"({len(extraction_timings)} page ranges, {extraction_ms:.0f} ms extraction); "
+            f"chunk tokens avg {chunk_stats['tokens_avg']}, max {chunk_stats['tokens_max']}, "
+            f"languages {chunk_stats['languages']}"
+        )
+        return file_id
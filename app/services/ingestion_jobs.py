@@ -0,0 +1,255 @@
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional, Set
+from app.repositories.job_repository import JobRepository
+from app.services.file_processing import FileProcessingService
+
+logger = logging.getLogger(__name__)
+
+# Ordered pipeline stages. Embedding and indexing repeat per chunk batch, so
+# progress comes from the pipeline details when it reports pages processed.
+STAGES = ["queued", "extracting", "embedding", "indexing", "completed"]
+
+
+class IngestionQueueFullError(Exception):
+    """Raised when the ingestion queue has no room for another upload."""
+
+
+class IngestionJobConflictError(Exception):
+    """Raised when a file is re-uploaded while its previous job is still pending."""
+
+
+class IngestionJobService:
+    """
+    Runs uploads through FileProcessingService on a bounded pool of asyncio
+    workers. Job state lives in MongoDB, so unfinished jobs are picked up
+    again on the next start. Several instances can share the jobs
+    collection: a worker claims a job atomically before running it and
+    heartbeats while it runs, and only jobs whose upload sits on this host
+    and whose runner went quiet for 'stale_seconds' are resumed.
+    """
+
+    def __init__(
+        self,
+        file_processing_service: FileProcessingService,
+        job_repository: JobRepository,
+        workers: int = 2,
+        queue_size: int = 100,
+        heartbeat_seconds: float = 15.0,
+        stale_seconds: float = 60.0
+    ):
+        self.file_processing_service = file_processing_service
+        self.job_repository = job_repository
+        self.workers = workers
+        self.queue_size = queue_size
+        self.heartbeat_seconds = heartbeat_seconds
+        self.stale_seconds = stale_seconds
+        # Uploads are written to local temp files, so jobs are tied to a host
+        self.host = socket.gethostname()
+        self.owner = f"{self.host}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.queue: Optional[asyncio.Queue] = None
+        # Job ids waiting in this process's queue
+        self._enqueued: Set[str] = set()
+        self._tasks: List[asyncio.Task] = []
+        # Slots held by submissions still awaiting Mongo, so concurrent uploads can't overfill the queue
+        self._reserved = 0
+
+    async def start(self):
+        """Spawn the workers and re-enqueue jobs left over from a previous run."""
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [
+            asyncio.create_task(self._worker(i)) for i in range(self.workers)
+        ]
+        self._tasks.append(asyncio.create_task(self._resume_stale_jobs()))
+        logger.info("Started %d ingestion workers", self.workers)
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("Stopped ingestion workers")
+
+    async def submit(
+        self,
+        file_path: str,
+        file_name: str,
+        user_id: str,
+        username: str,
+        file_id: Optional[str] = None
+    ) -> dict:
+        """
+        Register the upload, persist a queued job and hand it to the workers.
+        Passing an existing 'file_id' queues an incremental re-ingest of a
+        new version of that file.
+        """
+        if self.queue is None:
+            raise RuntimeError("Ingestion workers are not running")
+        if self.queue_size > 0 and self.queue.qsize() + self._reserved >= self.queue_size:
+            raise IngestionQueueFullError("Ingestion queue is full, try again later")
+
+        self._reserved += 1
+        try:
+            job = await self._create_job(file_path, file_name, user_id, username, file_id)
+            try:
+                self.queue.put_nowait(job["file_id"])
+            except asyncio.QueueFull:
+                # Jobs resumed at startup don't reserve slots and can still take this one
+                await self.job_repository.update_job(
+                    job["file_id"], {"status": "failed", "error": "Ingestion queue was full"}
+                )
+                raise IngestionQueueFullError("Ingestion queue is full, try again later")
+            self._enqueued.add(job["file_id"])
+        finally:
+            self._reserved -= 1
+        logger.info("Queued ingestion job for file_id %s", job["file_id"])
+        return job
+
+    async def _create_job(
+        self,
+        file_path: str,
+        file_name: str,
+        user_id: str,
+        username: str,
+        file_id: Optional[str]
+    ) -> dict:
+        incremental = file_id is not None
+        if incremental:
+            previous = await self.job_repository.get_job(file_id)
+            if previous and previous.get("status") in ("queued", "running"):
+                raise IngestionJobConflictError("This file is still being processed")
+        else:
+            file_id = await self.file_processing_service.save_upload(
+                file_path, file_name, user_id, username
+            )
+        job = {
+            "file_id": str(file_id),
+            "filename": file_name,
+            "user_id": user_id,
+            "username": username,
+            "file_path": file_path,
+            "host": self.host,
+            "incremental": incremental,
+            "status": "queued",
+            "stage": "queued",
+            "progress": 0.0,
+            "details": {},
+            "error": None,
+        }
+        await self.job_repository.create_job(job)
+        return job
+
+    async def get_status(self, file_id: str) -> Optional[dict]:
+        job = await self.job_repository.get_job(file_id)
+        if not job:
+            return None
+        return {
+            "file_id": job["file_id"],
+            "filename": job.get("filename"),
+            "user_id": job.get("user_id"),
+            "status": job.get("status"),
+            "stage": job.get("stage"),
+            "progress": job.get("progress", 0.0),
+            "details": job.get("details", {}),
+            "error": job.get("error"),
+            "created_at": job.get("created_at"),
+            "updated_at": job.get("updated_at"),
+        }
+
+    async def _resume_stale_jobs(self):
+        """
+        Re-enqueue this host's jobs left behind by a stopped process, at
+        startup and then every 'stale_seconds'. Jobs a live worker still
+        heartbeats are left alone, and the claim in _run_job settles races.
+        """
+        while True:
+            stale_before = datetime.utcnow() - timedelta(seconds=self.stale_seconds)
+            jobs = await self.job_repository.get_resumable_jobs(self.host, stale_before)
+            jobs = [job for job in jobs if job["file_id"] not in self._enqueued]
+            if jobs:
+                logger.info("Resuming %d unfinished ingestion jobs", len(jobs))
+            for job in jobs:
+                self._enqueued.add(job["file_id"])
+                await self.queue.put(job["file_id"])
+            await asyncio.sleep(self.stale_seconds)
+
+    async def _worker(self, worker_id: int):
+        while True:
+            file_id = await self.queue.get()
+            try:
+                await self._run_job(file_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Ingestion worker %d crashed on file_id %s", worker_id, file_id)
+            finally:
+                self._enqueued.discard(file_id)
+                self.queue.task_done()
+
+    async def _heartbeat(self, file_id: str):
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            await self.job_repository.heartbeat(file_id, self.owner)
+
+    async def _run_job(self, file_id: str):
+        stale_before = datetime.utcnow() - timedelta(seconds=self.stale_seconds)
+        job = await self.job_repository.claim_job(file_id, self.owner, stale_before)
+        if not job:
+            logger.info("Ingestion job %s is finished or held by another worker, skipping", file_id)
+            return
+        # A job that already had a runner is resumed; point ids are
+        # deterministic, so it only upserts what is missing
+        incremental = job.get("incremental", False) or job.get("owner") is not None
+
+        file_path = job["file_path"]
+        if not os.path.exists(file_path):
+            await self.job_repository.update_job(
+                file_id, {"status": "failed", "error": "Uploaded file is no longer available"}, owner=self.owner
+            )
+            return
+
+        async def on_stage(stage: str, details: dict):
+            details = dict(details)
+            progress = details.pop("progress", STAGES.index(stage) / (len(STAGES) - 1))
+            await self.job_repository.update_job(file_id, {
+                "stage": stage,
+                "progress": round(progress, 4),
+                "details": details,
+            }, owner=self.owner)
+
+        heartbeat = asyncio.create_task(self._heartbeat(file_id))
+        try:
+            await self.file_processing_service.process_upload(
+                file_path,
+                job["filename"],
+                job["user_id"],
+                job["username"],
+                file_id=file_id,
+                on_stage=on_stage,
+                incremental=incremental
+            )
+        except asyncio.CancelledError:
+            # Left as "running"; once the heartbeat is stale it is resumed
+            raise
+        except Exception as e:
+            logger.error(f"Ingestion job {file_id} failed: {e}")
+            await self.job_repository.update_job(file_id, {"status": "failed", "error": str(e)}, owner=self.owner)
+        else:
+            await self.job_repository.update_job(file_id, {
+                "status": "completed",
+                "stage": "completed",
+                "progress": 1.0,
+            }, owner=self.owner)
+            logger.info("Ingestion job %s completed", file_id)
+        finally:
+            heartbeat.cancel()
+
+        # Finished either way; the temp file is no longer needed
+        try:
+            os.remove(file_path)
+        except OSError:
+            logger.warning("Could not remove temporary upload %s", file_path)
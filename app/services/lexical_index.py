@@ -0,0 +1,201 @@
+import asyncio
+import gzip
+import json
+import logging
+import math
+import os
+import uuid
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.utils.cache import LRUCache
+from app.utils.tokenizer import tokenize
+
+logger = logging.getLogger(__name__)
+
+
+class BM25Index:
+    """
+    In-memory inverted index over the chunks of one file, scored with BM25.
+    Each document keeps its Qdrant point id and payload so lexical hits look
+    the same as vector hits.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.doc_ids: List[str] = []
+        self.payloads: List[dict] = []
+        self.doc_lengths: List[int] = []
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def add(self, point_id: str, text: str, payload: dict) -> None:
+        tokens = tokenize(text)
+        self.add_terms(point_id, payload, len(tokens), Counter(tokens))
+
+    def add_terms(self, point_id: str, payload: dict, length: int, terms: Dict[str, int]) -> None:
+        """Add a document that is already tokenized into term frequencies."""
+        doc_index = len(self.doc_ids)
+        self.doc_ids.append(point_id)
+        self.payloads.append(payload)
+        self.doc_lengths.append(length)
+        self._total_length += length
+        for term, frequency in terms.items():
+            self.postings.setdefault(term, []).append((doc_index, frequency))
+
+    def search(self, query: str, top_k: int = 5) -> List[Tuple[float, str, dict]]:
+        """Return (score, point_id, payload) for the best matching chunks."""
+        if not self.doc_ids:
+            return []
+        doc_count = len(self.doc_ids)
+        avg_length = self._total_length / doc_count or 1.0
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_index, frequency in postings:
+                length_norm = 1 - self.b + self.b * self.doc_lengths[doc_index] / avg_length
+                scores[doc_index] = scores.get(doc_index, 0.0) + idf * (
+                    frequency * (self.k1 + 1) / (frequency + self.k1 * length_norm)
+                )
+        best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        return [(score, self.doc_ids[i], self.payloads[i]) for i, score in best]
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BM25Index":
+        """Load an index saved whole, as files written before version 2 were."""
+        index = cls(k1=data.get("k1", 1.2), b=data.get("b", 0.75))
+        index.doc_ids = data["doc_ids"]
+        index.payloads = data["payloads"]
+        index.doc_lengths = data["doc_lengths"]
+        index.postings = {term: [tuple(p) for p in postings] for term, postings in data["postings"].items()}
+        index._total_length = sum(index.doc_lengths)
+        return index
+
+
+class BM25IndexWriter:
+    """
+    Streams a file's documents to disk as they are ingested, one gzipped
+    JSON line each after a header line, so building an index never holds
+    the file's chunks in memory. The previous index stays in place until
+    commit().
+    """
+
+    VERSION = 2
+
+    def __init__(self, path: str, k1: float = 1.2, b: float = 0.75):
+        self.path = path
+        self.tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        self.count = 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = gzip.open(self.tmp_path, "wt", encoding="utf-8")
+        self._file.write(json.dumps({"version": self.VERSION, "k1": k1, "b": b}) + "\n")
+
+    def write(self, docs: Iterable[Tuple[str, str, dict]]) -> None:
+        """Tokenize and append (point_id, text, payload) documents."""
+        for point_id, text, payload in docs:
+            tokens = tokenize(text)
+            line = {"id": point_id, "payload": payload, "length": len(tokens), "terms": Counter(tokens)}
+            self._file.write(json.dumps(line, ensure_ascii=False) + "\n")
+            self.count += 1
+
+    def commit(self) -> None:
+        self._file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self) -> None:
+        self._file.close()
+        try:
+            os.remove(self.tmp_path)
+        except OSError:
+            pass
+
+
+class LexicalIndexStore:
+    """
+    Persists one BM25 index per file as gzipped JSON under
+    '<directory>/<user_id>/<file_id>.json.gz' and keeps recently used
+    indexes loaded. Disk I/O runs in a worker thread.
+    """
+
+    def __init__(self, directory: str, max_loaded: int = 64):
+        self.directory = directory
+        self.loaded = LRUCache(max_entries=max_loaded)
+
+    def _path(self, user_id: str, file_id: str) -> str:
+        return os.path.join(self.directory, user_id, f"{file_id}.json.gz")
+
+    def _read(self, path: str) -> Optional[BM25Index]:
+        if not os.path.exists(path):
+            return None
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+            if header.get("version", 1) < BM25IndexWriter.VERSION:
+                return BM25Index.from_dict(header)
+            index = BM25Index(k1=header["k1"], b=header["b"])
+            for line in f:
+                doc = json.loads(line)
+                index.add_terms(doc["id"], doc["payload"], doc["length"], doc["terms"])
+            return index
+
+    def _delete(self, user_id: str, file_ids: Iterable[str]) -> int:
+        deleted = 0
+        for file_id in file_ids:
+            try:
+                os.remove(self._path(user_id, file_id))
+                deleted += 1
+            except FileNotFoundError:
+                pass
+        return deleted
+
+    async def open_writer(self, user_id: str, file_id: str) -> BM25IndexWriter:
+        return await asyncio.to_thread(BM25IndexWriter, self._path(user_id, file_id))
+
+    async def write(self, writer: BM25IndexWriter, docs: List[Tuple[str, str, dict]]) -> None:
+        await asyncio.to_thread(writer.write, docs)
+
+    async def commit(self, user_id: str, file_id: str, writer: BM25IndexWriter) -> None:
+        """Replace the file's index with the written one; it is loaded on the next search."""
+        await asyncio.to_thread(writer.commit)
+        self.loaded.pop((user_id, file_id))
+        logger.info(f"Saved lexical index for file {file_id} ({writer.count} chunks)")
+
+    async def abort(self, writer: BM25IndexWriter) -> None:
+        await asyncio.to_thread(writer.abort)
+
+    async def delete(self, user_id: str, file_ids: Iterable[str]) -> None:
+        file_ids = list(file_ids)
+        deleted = await asyncio.to_thread(self._delete, user_id, file_ids)
+        for file_id in file_ids:
+            self.loaded.pop((user_id, file_id))
+        logger.info(f"Deleted {deleted} lexical indexes of user {user_id}")
+
+    async def load(self, user_id: str, file_id: str) -> Optional[BM25Index]:
+        index = self.loaded.get((user_id, file_id))
+        if index is None:
+            index = await asyncio.to_thread(self._read, self._path(user_id, file_id))
+            if index is not None:
+                self.loaded.set((user_id, file_id), index)
+        return index
+
+    def list_file_ids(self, user_id: str) -> List[str]:
+        user_dir = os.path.join(self.directory, user_id)
+        if not os.path.isdir(user_dir):
+            return []
+        return [name[:-len(".json.gz")] for name in os.listdir(user_dir) if name.endswith(".json.gz")]
+
+    async def search(self, query: str, user_id: str, file_id: Optional[str] = None, top_k: int = 5):
+        """Search one file, or every indexed file of the user."""
+        file_ids = [file_id] if file_id else self.list_file_ids(user_id)
+        hits = []
+        for fid in file_ids:
+            index = await self.load(user_id, fid)
+            if index is not None:
+                hits.extend(index.search(query, top_k))
+        hits.sort(key=lambda hit: hit[0], reverse=True)
+        return hits[:top_k]
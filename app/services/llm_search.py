@@ -1,9 +1,14 @@
 import logging
-from app.clients.cohere_embedding_client import CohereEmbeddingClient
+from typing import AsyncIterator, List, Optional, Tuple
 from app.repositories.qdrant_repository import QdrantRepository
 from app.repositories.mongo_repository import MongoRepository
 from app.repositories.prompt_repository import PromptRepository
 from app.services.semantic_search import SemanticSearchService
+from app.services.reranker import RerankStage
+from app.services.context_builder import ContextBuilder
+from app.services.answer_cache import AnswerCache
+from app.services.prompt_cache import PromptCache
+from app.utils.language_detector import detect_language
 
 logger = logging.getLogger(__name__)
 
@@ -15,7 +20,13 @@ class LLMSearchService:
         cohere_chat_client,
         qdrant_repository,
         mongo_repository,
-        prompt_repository
+        prompt_repository,
+        prompt_cache: PromptCache,
+        rerank_stage: RerankStage,
+        context_builder: ContextBuilder,
+        rerank_candidates: int = 50,
+        answer_cache: Optional[AnswerCache] = None,
+        prompt_names_by_language: Optional[dict] = None
     ):
         self.semantic_search_service = semantic_search_service
         self.cohere_embedding_client = cohere_embedding_client
@@ -23,58 +34,139 @@ class LLMSearchService:
         self.qdrant_repository = qdrant_repository
         self.mongo_repository = mongo_repository
         self.prompt_repository = prompt_repository
+        self.prompt_cache = prompt_cache
+        self.rerank_stage = rerank_stage
+        self.context_builder = context_builder
+        self.rerank_candidates = rerank_candidates
+        self.answer_cache = answer_cache
+        self.prompt_names_by_language = prompt_names_by_language or {}
+
+    def resolve_prompt_name(self, question: str, prompt_name: Optional[str], language: Optional[str] = None) -> str:
+        """Explicit prompt name, else the prompt configured for the question's language."""
+        if prompt_name:
+            return prompt_name
+        language = language or detect_language(question)
+        return self.prompt_names_by_language.get(language, language)
+
+    async def _prepare_prompt(
+        self,
+        user_id: str,
+        question: str,
+        prompt_name: str,
+        file_id: str = None,
+        query_vector: Optional[List[float]] = None
+    ) -> dict:
+        """
+        Fetch the prompt template, retrieve and rerank context, and build the
+        final prompt. Returns {"error": ...} when no answer can be attempted.
+        """
+        # 1. Fetch the pre-parsed prompt template from the in-memory cache
+        prompt = await self.prompt_cache.get(prompt_name)
+        if not prompt:
+            return {"error": f"No prompt found with name '{prompt_name}'"}
+
+        # 2. Embed the question
+        if query_vector is None:
+            query_vector = await self.semantic_search_service.embed_query(question)
+
+        # 3. Over-fetch candidates from Qdrant and rerank them locally
+        results = await self.semantic_search_service.search_by_vector(
+            query_vector=query_vector,
+            file_id=file_id,
+            top_k=self.rerank_candidates,
+            user_id=user_id
+        )
+        if not results:
+            return {"error": "No relevant context found."}
+        results = await self.rerank_stage.rerank(question, results, query_vector=query_vector)
+
+        # 4. Dedupe, merge neighbouring chunks and fill the token budget
+        built = self.context_builder.build(results)
+
+        # 5. Build the final prompt by replacing placeholders
+        return {
+            "system": prompt.system,
+            "message": prompt.render(question=question, context=built["context"]),
+            "context": built,
+        }
 
     async def answer_question(
         self,
         user_id: str,
         question: str,
-        prompt_name: str = "default",
-        language: str = "english",
+        prompt_name: Optional[str] = None,
+        language: Optional[str] = None,
         file_id: str = None
     ) -> dict:
         """
         Search relevant context from vector DB, build prompt from MongoDB template,
-        and get an answer from the LLM.
+        and get an answer from the LLM. Without a prompt_name the prompt is
+        picked by the question's (or the given) language.
         """
         try:
-            # 1. Fetch prompt template from MongoDB
-            prompt_doc = await self.prompt_repository.get_prompt_by_name(prompt_name)
-            if not prompt_doc:
-                return {"error": f"No prompt found with name '{prompt_name}'"}
-
-            system_text = prompt_doc.get("system", "")
-            user_template = prompt_doc.get("user", "")
-
-            # 2. Embed the question
-            embedding = self.cohere_embedding_client.embed([question])
-            query_vector = embedding[0]
-
-            # 3. Search Qdrant for relevant chunks
-            results = self.qdrant_repository.search_vectors(
-                query_vector=query_vector,
-                file_id=file_id,
-                top_k=5
-            )
-            if not results:
-                return {"error": "No relevant context found."}
-
-            # 4. Extract clean text chunks
-            context_chunks = []
-            for hit in results[:3]:
-                text_chunk = hit.payload.get("text", "")
-                context_chunks.append(str(text_chunk))
-            context = "\n".join(context_chunks)
-
-            # 5. Build the final prompt by replacing placeholders
-            final_user_prompt = user_template.format(question=question, context=context)
+            prompt_name = self.resolve_prompt_name(question, prompt_name, language)
+            cache = self.answer_cache
+            query_vector = None
+            if cache is not None:
+                key = cache.key(user_id, file_id, prompt_name, question)
+                cached = cache.get(key)
+                if cached is None:
+                    query_vector = await self.semantic_search_service.embed_query(question)
+                    cached = cache.get_similar(user_id, file_id, prompt_name, query_vector)
+                if cached is not None:
+                    return {**cached, "cached": True}
+                generation = cache.generation
+
+            prepared = await self._prepare_prompt(user_id, question, prompt_name, file_id, query_vector)
+            if "error" in prepared:
+                return prepared
 
             # 6. Call Cohere LLM
-            response = self.cohere_chat_client.chat(message=final_user_prompt, system=system_text)
+            response = await self.cohere_chat_client.chat(message=prepared["message"], system=prepared["system"])
 
-            return {"answer": response}
+            result = {"answer": response, "context_tokens": prepared["context"]["tokens_used"]}
+            if cache is not None:
+                cache.set(key, user_id, file_id, prompt_name, query_vector, result, generation)
+            return {**result, "cached": False}
 
         except Exception as e:
             logger.exception("Failed to answer question")
             return {"error": f"Failed to answer question: {str(e)}"}
 
-    
\ No newline at end of file
+    async def stream_answer(
+        self,
+        user_id: str,
+        question: str,
+        prompt_name: Optional[str] = None,
+        file_id: str = None
+    ) -> AsyncIterator[Tuple[str, dict]]:
+        """
+        Yield (event, data) pairs: "sources" once the context is built, then
+        "token" per generated text delta, and finally "done" (or "error").
+        Closing the generator closes the upstream LLM stream.
+        """
+        prompt_name = self.resolve_prompt_name(question, prompt_name)
+        try:
+            prepared = await self._prepare_prompt(user_id, question, prompt_name, file_id)
+        except Exception as e:
+            logger.exception("Failed to prepare streamed answer")
+            yield "error", {"detail": f"Failed to answer question: {str(e)}"}
+            return
+        if "error" in prepared:
+            yield "error", {"detail": prepared["error"]}
+            return
+
+        yield "sources", {"sources": prepared["context"]["passages"]}
+
+        tokens = self.cohere_chat_client.chat_stream(message=prepared["message"], system=prepared["system"])
+        try:
+            async for text in tokens:
+                yield "token", {"text": text}
+        except Exception as e:
+            logger.exception("Streamed answer failed")
+            yield "error", {"detail": f"Failed to answer question: {str(e)}"}
+            return
+        finally:
+            await tokens.aclose()
+
+        yield "done", {"context_tokens": prepared["context"]["tokens_used"]}
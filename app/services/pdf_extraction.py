@@ -0,0 +1,96 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from concurrent.futures import Executor
+from typing import AsyncIterator, List, Optional, Tuple
+
+import fitz  # PyMuPDF
+
+logger = logging.getLogger(__name__)
+
+
+# Module-level helpers so they can be pickled into a process pool.
+def get_pdf_page_count(file_path: str) -> int:
+    with fitz.open(file_path) as doc:
+        return doc.page_count
+
+
+def extract_page_range(file_path: str, start: int, end: int) -> List[str]:
+    """Extract the text of pages [start, end) of a PDF."""
+    with fitz.open(file_path) as doc:
+        return [doc[page_number].get_text() for page_number in range(start, end)]
+
+
+def extract_page_range_timed(file_path: str, start: int, end: int) -> Tuple[List[str], float]:
+    """Like extract_page_range, also returning the seconds spent in the worker."""
+    started = time.perf_counter()
+    pages = extract_page_range(file_path, start, end)
+    return pages, time.perf_counter() - started
+
+
+class PdfTextExtractor:
+    """
+    Extracts PDF text in an executor (normally a process pool). Documents are
+    split into page ranges; up to 'max_parallel_ranges' ranges of one document
+    are extracted at once and their pages are yielded back in order, so only
+    a bounded window of the document is held in memory.
+    """
+
+    def __init__(
+        self,
+        executor: Optional[Executor] = None,
+        pages_per_range: int = 8,
+        max_parallel_ranges: int = 4
+    ):
+        self.executor = executor
+        self.pages_per_range = pages_per_range
+        self.max_parallel_ranges = max_parallel_ranges
+
+    async def page_count(self, file_path: str) -> int:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, get_pdf_page_count, file_path)
+
+    async def iter_pages(
+        self,
+        file_path: str,
+        page_count: Optional[int] = None,
+        timings: Optional[List[dict]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Yield the text of each page in order.
+        When 'timings' is given, one {"start", "end", "ms"} entry per page
+        range is appended to it as the range completes.
+        """
+        loop = asyncio.get_running_loop()
+        if page_count is None:
+            page_count = await self.page_count(file_path)
+        ranges = deque(
+            (start, min(start + self.pages_per_range, page_count))
+            for start in range(0, page_count, self.pages_per_range)
+        )
+        in_flight = deque()
+
+        def submit_next():
+            start, end = ranges.popleft()
+            future = loop.run_in_executor(
+                self.executor, extract_page_range_timed, file_path, start, end
+            )
+            in_flight.append((start, end, future))
+
+        try:
+            while ranges and len(in_flight) < self.max_parallel_ranges:
+                submit_next()
+            while in_flight:
+                start, end, future = in_flight.popleft()
+                pages, elapsed = await future
+                if ranges:
+                    submit_next()
+                logger.debug("Extracted pages %d-%d in %.0f ms", start, end - 1, elapsed * 1000)
+                if timings is not None:
+                    timings.append({"start": start, "end": end, "ms": round(elapsed * 1000, 1)})
+                for text in pages:
+                    yield text
+        finally:
+            for _, _, future in in_flight:
+                future.cancel()
@@ -0,0 +1,167 @@
+import asyncio
+import logging
+import string
+from typing import Callable, Dict, List, Optional, Tuple
+from pymongo.errors import OperationFailure, PyMongoError
+from app.repositories.prompt_repository import PromptRepository
+
+logger = logging.getLogger(__name__)
+
+_FORMATTER = string.Formatter()
+
+
+class PromptTemplate:
+    """
+    A prompt document with its user template parsed once into literal and
+    field segments, so rendering is a single join.
+    """
+
+    def __init__(self, prompt_name: str, system: str, user: str):
+        self.prompt_name = prompt_name
+        self.system = system
+        self.user = user
+        self._segments: Optional[List[Tuple[str, Optional[str]]]] = []
+        for literal, field, spec, conversion in _FORMATTER.parse(user):
+            if field is not None and (spec or conversion or not field.isidentifier()):
+                # Indexing, attributes or format specs: leave those to str.format
+                self._segments = None
+                break
+            self._segments.append((literal, field))
+
+    @classmethod
+    def from_doc(cls, doc: Dict) -> "PromptTemplate":
+        return cls(doc["prompt_name"], doc.get("system", ""), doc.get("user", ""))
+
+    def render(self, **values) -> str:
+        """Same result as 'user.format(**values)'."""
+        if self._segments is None:
+            return self.user.format(**values)
+        parts = []
+        for literal, field in self._segments:
+            parts.append(literal)
+            if field is not None:
+                parts.append(str(values[field]))
+        return "".join(parts)
+
+
+class PromptCache:
+    """
+    In-memory copy of the prompts collection, warmed at startup and kept
+    current from a Mongo change stream. Deployments without change streams
+    (standalone mongod) fall back to reloading every 'poll_seconds'.
+    Built-in 'fallbacks' are cached alongside and overridden by stored
+    prompts of the same name.
+    """
+
+    def __init__(
+        self,
+        prompt_repository: PromptRepository,
+        poll_seconds: float = 60.0,
+        use_change_streams: bool = True,
+        fallbacks: Optional[Dict[str, PromptTemplate]] = None
+    ):
+        self.prompt_repository = prompt_repository
+        # Built-in templates used when no prompt of that name is stored
+        self.fallbacks = fallbacks or {}
+        self.poll_seconds = poll_seconds
+        self.use_change_streams = use_change_streams
+        self._templates: Dict[str, PromptTemplate] = {}
+        # Delete events only carry the _id
+        self._names_by_id: Dict[str, str] = {}
+        self._listeners: List[Callable[[str], None]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def add_change_listener(self, listener: Callable[[str], None]) -> None:
+        """Call 'listener(prompt_name)' whenever a cached prompt changes."""
+        self._listeners.append(listener)
+
+    async def start(self):
+        await self.reload()
+        self._task = asyncio.create_task(self._refresh_loop())
+        logger.info("Prompt cache warmed with %d prompts", len(self._templates))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def get(self, prompt_name: str) -> Optional[PromptTemplate]:
+        template = self._templates.get(prompt_name)
+        if template is None:
+            # Inserted after the last refresh, or the cache was never started
+            doc = await self.prompt_repository.get_prompt_by_name(prompt_name)
+            if doc:
+                template = self._store(doc)
+            else:
+                template = self.fallbacks.get(prompt_name)
+        return template
+
+    async def reload(self):
+        docs = await self.prompt_repository.get_all_prompts()
+        templates = dict(self.fallbacks)
+        templates.update((doc["prompt_name"], PromptTemplate.from_doc(doc)) for doc in docs)
+        changed = {
+            name for name in set(templates) | set(self._templates)
+            if name not in templates or name not in self._templates
+            or self._templates[name].system != templates[name].system
+            or self._templates[name].user != templates[name].user
+        }
+        self._templates = templates
+        self._names_by_id = {str(doc["_id"]): doc["prompt_name"] for doc in docs}
+        for name in changed:
+            self._notify(name)
+
+    def _store(self, doc: Dict) -> PromptTemplate:
+        template = PromptTemplate.from_doc(doc)
+        previous_name = self._names_by_id.get(str(doc["_id"]))
+        if previous_name and previous_name != template.prompt_name:
+            self._drop(previous_name)
+        self._templates[template.prompt_name] = template
+        self._names_by_id[str(doc["_id"])] = template.prompt_name
+        return template
+
+    def _drop(self, prompt_name: str):
+        """Forget a stored prompt, restoring the built-in one of that name."""
+        if prompt_name in self.fallbacks:
+            self._templates[prompt_name] = self.fallbacks[prompt_name]
+        else:
+            self._templates.pop(prompt_name, None)
+
+    def _apply_change(self, change: Dict):
+        operation = change.get("operationType")
+        if operation in ("insert", "update", "replace"):
+            doc = change.get("fullDocument")
+            if doc and doc.get("prompt_name"):
+                self._notify(self._store(doc).prompt_name)
+        elif operation == "delete":
+            name = self._names_by_id.pop(str(change["documentKey"]["_id"]), None)
+            if name:
+                self._drop(name)
+                self._notify(name)
+
+    def _notify(self, prompt_name: str):
+        for listener in self._listeners:
+            listener(prompt_name)
+
+    async def _refresh_loop(self):
+        while self.use_change_streams:
+            try:
+                async with self.prompt_repository.watch() as stream:
+                    # Catch changes made between the warm-up and the stream opening
+                    await self.reload()
+                    async for change in stream:
+                        self._apply_change(change)
+            except OperationFailure as e:
+                logger.info(f"Prompt change streams unavailable ({e}), polling every {self.poll_seconds}s")
+                break
+            except PyMongoError as e:
+                logger.warning(f"Prompt change stream interrupted: {e}")
+                await asyncio.sleep(self.poll_seconds)
+
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            try:
+                await self.reload()
+            except PyMongoError as e:
+                logger.warning(f"Prompt cache refresh failed: {e}")
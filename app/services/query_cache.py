@@ -0,0 +1,129 @@
+import hashlib
+import logging
+from array import array
+from typing import Callable, Dict, List, Optional, Set
+from app.services.embedding_cache import normalize_chunk_text
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+def _results_bytes(results: list) -> int:
+    size = 128
+    for hit in results:
+        payload = getattr(hit, "payload", None) or {}
+        size += 256 + sum(len(str(value)) for value in payload.values())
+    return size
+
+
+class QueryCache:
+    """
+    TTL+LRU caches for query embeddings and for Qdrant search results.
+    Result entries are tracked by file_id so writes or deletes for a file
+    drop every cached search that could include it; query embeddings do
+    not depend on stored vectors and only expire.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 300.0,
+        max_entries: int = 10000,
+        max_embedding_bytes: int = 16 * 1024 * 1024,
+        max_result_bytes: int = 32 * 1024 * 1024
+    ):
+        self.embeddings = TTLCache(
+            max_entries=max_entries,
+            ttl_seconds=ttl_seconds,
+            max_bytes=max_embedding_bytes,
+            sizeof=lambda packed: len(packed) * packed.itemsize + 64
+        )
+        self.results = TTLCache(
+            max_entries=max_entries,
+            ttl_seconds=ttl_seconds,
+            max_bytes=max_result_bytes,
+            sizeof=_results_bytes
+        )
+        # file_id (None for unfiltered searches) -> result keys
+        self._result_keys: Dict[Optional[str], Set[str]] = {}
+        # Bumped on every invalidation so in-flight searches don't cache stale hits
+        self.generation = 0
+        # Downstream caches (e.g. answers) that must drop entries with ours
+        self._invalidation_listeners: List[Callable[[Optional[str]], None]] = []
+        self.stats = {
+            "embedding_hits": 0,
+            "embedding_misses": 0,
+            "result_hits": 0,
+            "result_misses": 0,
+            "invalidations": 0,
+        }
+
+    @staticmethod
+    def embedding_key(model: str, input_type: str, query: str) -> str:
+        digest = hashlib.sha256(normalize_chunk_text(query).encode("utf-8")).hexdigest()
+        return f"{model}:{input_type}:{digest}"
+
+    @staticmethod
+    def result_key(query_vector: List[float], file_id: Optional[str], top_k: int, **options) -> str:
+        digest = hashlib.sha256(array("f", query_vector).tobytes())
+        digest.update(f"|{file_id}|{top_k}|{sorted(options.items())}".encode("utf-8"))
+        return digest.hexdigest()
+
+    def get_embedding(self, key: str) -> Optional[List[float]]:
+        packed = self.embeddings.get(key)
+        if packed is None:
+            self.stats["embedding_misses"] += 1
+            return None
+        self.stats["embedding_hits"] += 1
+        return packed.tolist()
+
+    def set_embedding(self, key: str, vector: List[float]) -> None:
+        self.embeddings.set(key, array("f", vector))
+
+    def get_results(self, key: str) -> Optional[list]:
+        results = self.results.get(key)
+        if results is None:
+            self.stats["result_misses"] += 1
+            return None
+        self.stats["result_hits"] += 1
+        return list(results)
+
+    def set_results(self, key: str, file_id: Optional[str], results: list, generation: int) -> None:
+        if generation != self.generation:
+            return
+        self.results.set(key, list(results))
+        keys = self._result_keys.setdefault(file_id, set())
+        keys.add(key)
+        if len(keys) > len(self.results):
+            # Forget keys the LRU already evicted or that expired
+            keys.intersection_update([k for k in keys if k in self.results])
+
+    def add_invalidation_listener(self, listener: Callable[[Optional[str]], None]) -> None:
+        """Call 'listener(file_id)' whenever results for a file are invalidated."""
+        self._invalidation_listeners.append(listener)
+
+    def invalidate_file(self, file_id: Optional[str]) -> None:
+        """
+        Drop cached results for 'file_id' and for unfiltered searches.
+        A None file_id drops every cached result.
+        """
+        self.generation += 1
+        self.stats["invalidations"] += 1
+        for listener in self._invalidation_listeners:
+            listener(file_id)
+        if file_id is None:
+            self.results.clear()
+            self._result_keys.clear()
+            return
+        for scope in (file_id, None):
+            for key in self._result_keys.pop(scope, set()):
+                self.results.pop(key)
+        logger.debug("Invalidated cached search results for file_id %s", file_id)
+
+    def get_stats(self) -> dict:
+        return {
+            **self.stats,
+            "embedding_entries": len(self.embeddings),
+            "embedding_bytes": self.embeddings.total_bytes,
+            "result_entries": len(self.results),
+            "result_bytes": self.results.total_bytes,
+        }
@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from app.services.embedding_cache import EmbeddingCache
+from app.utils.tokenizer import tokenize
+
+logger = logging.getLogger(__name__)
+
+RERANK_SCORERS = ("none", "lexical", "cosine")
+
+
+def _normalized_retrieval_scores(hits: list) -> np.ndarray:
+    """Min-max normalize retrieval scores so RRF and cosine scores are comparable."""
+    scores = np.array([float(hit.score) for hit in hits], dtype=np.float32)
+    spread = scores.max() - scores.min()
+    if spread <= 0:
+        return np.ones_like(scores)
+    return (scores - scores.min()) / spread
+
+
+class Reranker:
+    """
+    Base scorer: keeps the retrieval order. Scorers return one score per
+    hit, or -inf for hits they did not reach before 'deadline' (a
+    time.perf_counter() value); those keep their retrieval order after the
+    scored ones.
+    """
+
+    needs_query_vector = False
+
+    async def score(
+        self,
+        query: str,
+        query_vector: Optional[List[float]],
+        hits: list,
+        deadline: float
+    ) -> Optional[np.ndarray]:
+        return None
+
+
+class LexicalOverlapReranker(Reranker):
+    """
+    Blends the retrieval score with the share of query terms found in each
+    chunk. Only the first 'max_text_chars' of a chunk are tokenized, and
+    candidates are scored in retrieval order until the deadline passes.
+    """
+
+    def __init__(self, lexical_weight: float = 0.5, max_text_chars: int = 2000):
+        self.lexical_weight = lexical_weight
+        self.max_text_chars = max_text_chars
+
+    async def score(self, query, query_vector, hits, deadline):
+        query_terms = set(tokenize(query))
+        if not query_terms:
+            return None
+        retrieval = _normalized_retrieval_scores(hits)
+        scores = np.full(len(hits), -np.inf, dtype=np.float32)
+        for i, hit in enumerate(hits):
+            if time.perf_counter() > deadline:
+                break
+            terms = tokenize(hit.payload.get("text", "")[:self.max_text_chars])
+            overlap = len(query_terms.intersection(terms)) / len(query_terms)
+            scores[i] = (1 - self.lexical_weight) * retrieval[i] + self.lexical_weight * overlap
+        return scores
+
+
+class CosineReranker(Reranker):
+    """
+    Re-scores candidates by exact cosine against chunk vectors from the
+    embedding cache. This gives lexical and fused hits a real similarity.
+    Chunks without a cached vector have no comparable score and are ranked
+    after the others, in retrieval order.
+    """
+
+    needs_query_vector = True
+
+    def __init__(self, embedding_cache: EmbeddingCache, model: str, input_type: str):
+        self.embedding_cache = embedding_cache
+        self.model = model
+        self.input_type = input_type
+
+    async def score(self, query, query_vector, hits, deadline):
+        if query_vector is None:
+            return None
+        texts = [hit.payload.get("text", "") for hit in hits]
+        cached = await self.embedding_cache.get_many(self.model, self.input_type, texts)
+        present = [i for i, vector in enumerate(cached) if vector is not None]
+        if not present:
+            return None
+        matrix = np.array([cached[i] for i in present], dtype=np.float32)
+        query = np.asarray(query_vector, dtype=np.float32)
+        scores = np.full(len(hits), -np.inf, dtype=np.float32)
+        scores[present] = matrix @ query / (np.linalg.norm(matrix, axis=1) * np.linalg.norm(query) + 1e-12)
+        return scores
+
+
+class RerankStage:
+    """
+    Reorders over-fetched candidates with a cheap local scorer inside a
+    latency budget. The scorer gets the deadline and stops scoring when it
+    passes; whatever it scored by then is used. Awaits inside the scorer,
+    such as cache lookups, are cut off at the budget.
+    """
+
+    def __init__(self, reranker: Reranker, budget_ms: float = 30.0):
+        self.reranker = reranker
+        self.budget_ms = budget_ms
+
+    async def rerank(self, query: str, hits: list, query_vector: Optional[List[float]] = None) -> list:
+        if len(hits) < 2:
+            return list(hits)
+        started = time.perf_counter()
+        deadline = started + self.budget_ms / 1000
+        try:
+            scores = await asyncio.wait_for(
+                self.reranker.score(query, query_vector, hits, deadline),
+                timeout=self.budget_ms / 1000
+            )
+        except asyncio.TimeoutError:
+            logger.warning("Rerank exceeded its %.0f ms budget, keeping retrieval order", self.budget_ms)
+            return list(hits)
+        if scores is None:
+            return list(hits)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        scored = int(np.isfinite(scores).sum())
+        if scored < len(hits) and time.perf_counter() > deadline:
+            logger.warning(
+                "Rerank budget of %.0f ms ran out after %d of %d candidates; the rest keep retrieval order",
+                self.budget_ms, scored, len(hits)
+            )
+        order = np.argsort(-scores, kind="stable")
+        logger.debug("Reranked %d candidates in %.1f ms", len(hits), elapsed_ms)
+        return [hits[i] for i in order]
@@ -1,22 +1,79 @@
 import logging
-from typing import List
-from langchain.text_splitter import CharacterTextSplitter
-from app.clients.cohere_embedding_client import CohereEmbeddingClient
-from app.repositories.qdrant_repository import QdrantRepository
-from qdrant_client.models import PointStruct, Filter, FieldCondition, MatchValue  # Add these imports
-import uuid  # Also import uuid if not already imported
+from typing import List, Optional, Set
+from app.clients.embedding_backend import EmbeddingBackend
+from app.repositories.qdrant_repository import QdrantRepository, chunk_point_id
+from app.services.embedding_scheduler import EmbeddingScheduler
+from app.services.embedding_cache import EmbeddingCache, content_hash
+from app.services.query_cache import QueryCache
+from app.services.text_chunking import CHUNKERS, SentenceTextSplitter, StreamingTextSplitter
+from app.services.lexical_index import BM25IndexWriter, LexicalIndexStore
+from qdrant_client.models import Filter, FieldCondition, MatchValue, ScoredPoint
 
 logger = logging.getLogger(__name__)
 
+SEARCH_MODES = ("hybrid", "dense", "lexical")
+
+# Cohere v3 models embed queries and documents differently
+QUERY_INPUT_TYPE = "search_query"
+
+
+def reciprocal_rank_fusion(result_lists: List[list], top_k: int, k: int = 60) -> List[ScoredPoint]:
+    """Merge ranked hit lists by summing 1 / (k + rank) per point id."""
+    scores = {}
+    hits = {}
+    for results in result_lists:
+        for rank, hit in enumerate(results, start=1):
+            point_id = str(hit.id)
+            scores[point_id] = scores.get(point_id, 0.0) + 1.0 / (k + rank)
+            hits.setdefault(point_id, hit)
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+    return [
+        ScoredPoint(id=hits[point_id].id, version=hits[point_id].version, score=score, payload=hits[point_id].payload)
+        for point_id, score in ranked
+    ]
+
 class SemanticSearchService:
     def __init__(
         self,
-        cohere_client: CohereEmbeddingClient,
-        qdrant_repository: QdrantRepository
+        cohere_client: EmbeddingBackend,
+        qdrant_repository: QdrantRepository,
+        embedding_scheduler: EmbeddingScheduler,
+        embedding_cache: EmbeddingCache,
+        query_cache: QueryCache,
+        lexical_index_store: LexicalIndexStore,
+        default_mode: str = "hybrid",
+        hybrid_candidates: int = 20,
+        rrf_k: int = 60,
+        chunker: str = "sentence",
+        chunk_tokens: int = 200,
+        chunk_overlap_tokens: int = 30
     ):
+        if chunker not in CHUNKERS:
+            raise ValueError(f"Unknown chunker '{chunker}', expected one of {CHUNKERS}")
         self.cohere_client = cohere_client
         self.qdrant_repository = qdrant_repository
-        self.splitter = CharacterTextSplitter(
+        self.embedding_scheduler = embedding_scheduler
+        self.embedding_cache = embedding_cache
+        self.query_cache = query_cache
+        self.lexical_index_store = lexical_index_store
+        self.default_mode = default_mode
+        self.hybrid_candidates = hybrid_candidates
+        self.rrf_k = rrf_k
+        self.chunker = chunker
+        self.chunk_tokens = chunk_tokens
+        self.chunk_overlap_tokens = chunk_overlap_tokens
+
+    def new_splitter(self):
+        """
+        Return a fresh incremental splitter for one document: sentence-aware
+        and token-sized, or the legacy 500-character newline splitter.
+        """
+        if self.chunker == "sentence":
+            return SentenceTextSplitter(
+                chunk_tokens=self.chunk_tokens,
+                overlap_tokens=self.chunk_overlap_tokens
+            )
+        return StreamingTextSplitter(
             separator="\n",
             chunk_size=500,
             chunk_overlap=50
@@ -24,17 +81,34 @@ class SemanticSearchService:
 
     def split_text(self, text: str) -> List[str]:
         logger.info("Splitting text into chunks...")
-        return self.splitter.split_text(text)
+        return self.new_splitter().split_text(text)
 
     async def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, sending only cache misses to the provider."""
         try:
-            logger.info(f"Embedding {len(texts)} chunks with Cohere")
-            embeddings = self.cohere_client.embed(texts)  # synchronous call
+            model = self.cohere_client.model
+            input_type = self.cohere_client.input_type
+            embeddings = await self.embedding_cache.get_many(model, input_type, texts)
+
+            # Identical chunks are embedded once
+            missing = list(dict.fromkeys(
+                text for text, vector in zip(texts, embeddings) if vector is None
+            ))
+            logger.info(f"Embedding {len(missing)} of {len(texts)} chunks with Cohere (rest cached)")
+            if missing:
+                vectors = await self.embedding_scheduler.embed(missing)
+                await self.embedding_cache.put_many(model, input_type, missing, vectors)
+                fresh = dict(zip(missing, vectors))
+                embeddings = [
+                    vector if vector is not None else fresh[text]
+                    for text, vector in zip(texts, embeddings)
+                ]
             return embeddings
         except Exception as e:
             logger.error(f"Embedding failed: {e}")
             raise
-    def delete_user_vectors(self, username: str, filename: str = None):
+
+    async def delete_user_vectors(self, username: str, filename: str = None):
         must_conditions = [
             FieldCondition(
                 key="username",
@@ -52,57 +126,225 @@ class SemanticSearchService:
 
         q_filter = Filter(must=must_conditions)
 
-        self.qdrant_repository.delete_collection(filter=q_filter)
+        # Lexical indexes are stored per user_id and file_id, so look those up first
+        file_owners = await self.qdrant_repository.get_file_owners(q_filter)
+        await self.qdrant_repository.delete_vectors(q_filter)
+        files_by_user = {}
+        for file_id, user_id in file_owners.items():
+            files_by_user.setdefault(user_id, []).append(file_id)
+        for user_id, file_ids in files_by_user.items():
+            await self.lexical_index_store.delete(user_id, file_ids)
+        # The deleted points may belong to any of the user's files
+        self.query_cache.invalidate_file(None)
+
+    async def get_stored_point_ids(self, file_id: str) -> Set[str]:
+        return await self.qdrant_repository.get_point_ids(file_id)
+
+    async def delete_points(self, file_id: str, point_ids: List[str]):
+        await self.qdrant_repository.delete_points(point_ids)
+        self.query_cache.invalidate_file(file_id)
+
+    async def update_file_payload(self, file_id: str, payload: dict):
+        await self.qdrant_repository.set_file_payload(file_id, payload)
+        self.query_cache.invalidate_file(file_id)
 
-    async def store_vectors(self, embeddings: List[List[float]], chunks: List[str], metadata: dict, file_id: str):
+    def build_chunk_point(self, file_id: str, chunk_index: int, chunk: str, metadata: dict):
+        """Point id and payload stored for one chunk."""
+        digest = content_hash(chunk)
+        payload = {
+            "text": chunk,
+            **metadata,
+            "chunk_index": chunk_index,
+            "content_hash": digest,
+            "file_id": file_id,
+        }
+        return chunk_point_id(file_id, chunk_index, digest), payload
+
+    async def open_lexical_index(self, user_id: str, file_id: str) -> BM25IndexWriter:
+        return await self.lexical_index_store.open_writer(user_id, file_id)
+
+    async def write_lexical_index(self, writer: BM25IndexWriter, docs: List[tuple]):
+        """Append (point_id, text, payload) chunks to a lexical index being built."""
+        await self.lexical_index_store.write(writer, docs)
+
+    async def commit_lexical_index(self, user_id: str, file_id: str, writer: BM25IndexWriter):
+        await self.lexical_index_store.commit(user_id, file_id, writer)
+        self.query_cache.invalidate_file(file_id)
+
+    async def abort_lexical_index(self, writer: BM25IndexWriter):
+        await self.lexical_index_store.abort(writer)
+
+    async def store_vectors(
+        self,
+        embeddings: List[List[float]],
+        chunks: List[str],
+        metadata: dict,
+        file_id: str,
+        start_index: int = 0,
+        chunk_indexes: Optional[List[int]] = None
+    ):
+        """
+        Store chunk vectors under deterministic ids derived from
+        (file_id, chunk_index, content hash). 'chunk_indexes' gives each
+        chunk's position when the chunks are not consecutive.
+        """
         try:
+            if chunk_indexes is None:
+                chunk_indexes = list(range(start_index, start_index + len(chunks)))
             payloads = []
-            for i, chunk in enumerate(chunks):
-                payload = {
-                    "text": chunk,
-                    **metadata,
-                    "chunk_index": i,
-                }
+            point_ids = []
+            for i, chunk in zip(chunk_indexes, chunks):
+                point_id, payload = self.build_chunk_point(file_id, i, chunk, metadata)
                 payloads.append(payload)
+                point_ids.append(point_id)
 
             logger.info(f"Inserting {len(embeddings)} vectors into Qdrant")
-            self.qdrant_repository.insert_vectors(embeddings, payloads, file_id)
+            await self.qdrant_repository.insert_vectors(embeddings, payloads, file_id, ids=point_ids)
+            self.query_cache.invalidate_file(file_id)
         except Exception as e:
             logger.error(f"Failed to store vectors: {e}")
             raise
 
-    async def search(self, query: str, username: str, file_id: str):
+    async def embed_query(self, query: str) -> List[float]:
+        """Embed a search query, reusing the cached vector for repeated queries."""
+        model = self.cohere_client.model
+        key = self.query_cache.embedding_key(model, QUERY_INPUT_TYPE, query)
+        query_embedding = self.query_cache.get_embedding(key)
+        if query_embedding is None:
+            query_embedding = (await self.cohere_client.embed([query], input_type=QUERY_INPUT_TYPE))[0]
+            self.query_cache.set_embedding(key, query_embedding)
+        return query_embedding
+
+    async def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Embed many queries, sending every uncached one in a single provider call."""
+        model = self.cohere_client.model
+        keys = [self.query_cache.embedding_key(model, QUERY_INPUT_TYPE, query) for query in queries]
+        vectors = [self.query_cache.get_embedding(key) for key in keys]
+        missing = {}
+        for i, vector in enumerate(vectors):
+            if vector is None:
+                missing.setdefault(keys[i], []).append(i)
+        if missing:
+            texts = [queries[positions[0]] for positions in missing.values()]
+            embeddings = await self.cohere_client.embed(texts, input_type=QUERY_INPUT_TYPE)
+            for (key, positions), embedding in zip(missing.items(), embeddings):
+                self.query_cache.set_embedding(key, embedding)
+                for i in positions:
+                    vectors[i] = embedding
+        return vectors
+
+    async def search_batch(
+        self,
+        queries: List[str],
+        user_id: str,
+        file_ids: Optional[List[str]] = None,
+        top_k: int = 5,
+        payload_fields: Optional[List[str]] = None
+    ) -> List[dict]:
+        """
+        Dense search for many queries over the given files (or all of the
+        user's files) with one embedding call and one Qdrant request.
+        With explicit file_ids every file gets its own top_k; otherwise the
+        top_k over all files is grouped by file.
+        """
+        vectors = await self.embed_queries(queries)
+        if file_ids:
+            searches = [{"vector": vector, "file_id": file_id} for vector in vectors for file_id in file_ids]
+        else:
+            searches = [{"vector": vector} for vector in vectors]
+        if payload_fields is not None and not file_ids and "file_id" not in payload_fields:
+            # Needed below to group the hits by file
+            payload_fields = payload_fields + ["file_id"]
+        hit_lists = await self.qdrant_repository.search_vectors_batch(
+            searches, top_k=top_k, user_id=user_id, payload_fields=payload_fields
+        )
+
+        grouped = []
+        for i, query in enumerate(queries):
+            files = {}
+            if file_ids:
+                for j, file_id in enumerate(file_ids):
+                    files[file_id] = hit_lists[i * len(file_ids) + j]
+            else:
+                for hit in hit_lists[i]:
+                    files.setdefault(hit.payload.get("file_id"), []).append(hit)
+            grouped.append({"query": query, "files": files})
+        return grouped
+
+    async def search_by_vector(
+        self,
+        query_vector: List[float],
+        file_id: str = None,
+        top_k: int = 5,
+        user_id: str = None,
+        payload_fields: Optional[List[str]] = None
+    ):
+        """
+        Search Qdrant scoped to the user (and file, if given), serving
+        repeated lookups from cache. 'payload_fields' limits the payload
+        keys fetched; None fetches the whole payload.
+        """
+        key = self.query_cache.result_key(
+            query_vector, file_id, top_k, user_id=user_id, payload_fields=payload_fields
+        )
+        results = self.query_cache.get_results(key)
+        if results is None:
+            generation = self.query_cache.generation
+            results = await self.qdrant_repository.search_vectors(
+                query_vector=query_vector,
+                file_id=file_id,
+                top_k=top_k,
+                user_id=user_id,
+                payload_fields=payload_fields
+            )
+            self.query_cache.set_results(key, file_id, results, generation)
+        return results
+
+    async def lexical_search(self, query: str, user_id: str, file_id: str = None, top_k: int = 5) -> List[ScoredPoint]:
+        """BM25 search over the user's per-file lexical indexes."""
+        hits = await self.lexical_index_store.search(query, user_id, file_id=file_id, top_k=top_k)
+        return [
+            ScoredPoint(id=point_id, version=0, score=score, payload=payload)
+            for score, point_id, payload in hits
+        ]
+
+    async def search(
+        self,
+        query: str,
+        user_id: str,
+        file_id: str,
+        mode: str = None,
+        top_k: int = 5,
+        payload_fields: Optional[List[str]] = None
+    ):
+        """
+        Search with dense vectors, the lexical BM25 index, or both
+        ("hybrid", merged by reciprocal-rank fusion). 'payload_fields'
+        limits what Qdrant returns for dense hits.
+        """
+        mode = mode or self.default_mode
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode '{mode}'")
         try:
-            query_embedding = self.cohere_client.embed([query])[0]
+            if mode == "lexical":
+                return await self.lexical_search(query, user_id, file_id, top_k)
+
+            query_embedding = await self.embed_query(query)
             logger.debug(f"Query embedding length: {len(query_embedding)}")
             
-            results = self.qdrant_repository.search_vectors(
+            candidates = top_k if mode == "dense" else max(top_k, self.hybrid_candidates)
+            results = await self.search_by_vector(
                 query_vector=query_embedding,
                 file_id=file_id,
-                top_k=5
+                top_k=candidates,
+                user_id=user_id,
+                payload_fields=payload_fields
             )
-            logger.debug(f"Qdrant search results: {results}")
+            if mode == "hybrid":
+                lexical = await self.lexical_search(query, user_id, file_id, candidates)
+                results = reciprocal_rank_fusion([results, lexical], top_k, k=self.rrf_k)
+            logger.debug(f"Search results ({mode}): {results}")
             return results
         except Exception as e:
             logger.error(f"Search failed: {e}")
             raise
-
-    def insert_vectors(self, embeddings: List[List[float]], payloads: List[dict]):
-        logger.info("Inserting %d vectors into Qdrant...", len(embeddings))
-        try:
-            points = [
-                PointStruct(
-                    id=str(uuid.uuid4()),
-                    vector=embedding,
-                    payload=payload
-                )
-                for embedding, payload in zip(embeddings, payloads)
-            ]
-            self.client.upsert(
-                collection_name=self.collection_name,
-                points=points
-            )
-            logger.info("Successfully inserted vectors into Qdrant.")
-        except Exception as e:
-            logger.error(f"Failed to insert vectors into Qdrant: {e}")
-            raise
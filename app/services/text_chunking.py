@@ -0,0 +1,257 @@
+import logging
+import re
+from collections import Counter
+from typing import List, Tuple
+from app.utils.language_detector import detect_language
+from app.utils.tokenizer import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+CHUNKERS = ("sentence", "character")
+
+# A blank line ends a paragraph; sentence terminators include the Arabic
+# question mark and full stop
+_BOUNDARY = re.compile(r"(\n\s*\n)|(?<=[.!?\u061F\u06D4])\s+")
+
+
+class ChunkStats:
+    """Chunk count, estimated token sizes and per-language counts of one document."""
+
+    def __init__(self):
+        self.chunks = 0
+        self.tokens_total = 0
+        self.tokens_min = None
+        self.tokens_max = 0
+        self.languages = Counter()
+
+    def record(self, tokens: int, language: str):
+        self.chunks += 1
+        self.tokens_total += tokens
+        self.tokens_max = max(self.tokens_max, tokens)
+        if self.tokens_min is None or tokens < self.tokens_min:
+            self.tokens_min = tokens
+        self.languages[language] += 1
+
+    def to_dict(self) -> dict:
+        return {
+            "chunks": self.chunks,
+            "tokens_total": self.tokens_total,
+            "tokens_min": self.tokens_min,
+            "tokens_max": self.tokens_max,
+            "tokens_avg": round(self.tokens_total / self.chunks, 1) if self.chunks else None,
+            "languages": dict(self.languages),
+        }
+
+
+class StreamingTextSplitter:
+    """
+    Incremental version of langchain's CharacterTextSplitter: text is fed in
+    pieces (e.g. one PDF page at a time) and finished chunks are returned as
+    soon as they are complete, so the whole document never has to be joined
+    into one string. Chunk boundaries carry across feed() calls.
+    """
+
+    def __init__(self, separator: str = "\n", chunk_size: int = 500, chunk_overlap: int = 50):
+        if chunk_overlap > chunk_size:
+            raise ValueError("chunk_overlap must not be larger than chunk_size")
+        self.separator = separator
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self._pending = ""
+        self._current: List[str] = []
+        self._total = 0
+        self.stats = ChunkStats()
+
+    def feed(self, text: str) -> List[str]:
+        """Add text and return the chunks it completed."""
+        splits = (self._pending + text).split(self.separator)
+        # The last piece may continue in the next feed
+        self._pending = splits.pop()
+        return self._record(self._merge(splits))
+
+    def flush(self) -> List[str]:
+        """Return the remaining chunks once all text has been fed."""
+        chunks = self._merge([self._pending])
+        self._pending = ""
+        final = self._join(self._current)
+        self._current = []
+        self._total = 0
+        if final:
+            chunks.append(final)
+        return self._record(chunks)
+
+    def split_text(self, text: str) -> List[str]:
+        return self.feed(text) + self.flush()
+
+    def get_stats(self) -> dict:
+        return self.stats.to_dict()
+
+    def _record(self, chunks: List[str]) -> List[str]:
+        for chunk in chunks:
+            language = detect_language(chunk)
+            self.stats.record(estimate_tokens(chunk, language), language)
+        return chunks
+
+    def _join(self, splits: List[str]) -> str:
+        return self.separator.join(splits).strip()
+
+    def _merge(self, splits: List[str]) -> List[str]:
+        separator_len = len(self.separator)
+        chunks = []
+        for split in splits:
+            if split == "":
+                continue
+            split_len = len(split)
+            joined_len = separator_len if self._current else 0
+            if self._total + split_len + joined_len > self.chunk_size:
+                if self._total > self.chunk_size:
+                    logger.warning(
+                        "Created a chunk of size %d, which is longer than the specified %d",
+                        self._total, self.chunk_size
+                    )
+                if self._current:
+                    chunk = self._join(self._current)
+                    if chunk:
+                        chunks.append(chunk)
+                    # Keep a tail of splits as overlap for the next chunk
+                    while self._total > self.chunk_overlap or (
+                        self._total + split_len + (separator_len if self._current else 0) > self.chunk_size
+                        and self._total > 0
+                    ):
+                        self._total -= len(self._current[0]) + (separator_len if len(self._current) > 1 else 0)
+                        self._current = self._current[1:]
+            self._current.append(split)
+            self._total += split_len + (separator_len if len(self._current) > 1 else 0)
+        return chunks
+
+
+class SentenceTextSplitter:
+    """
+    Streaming splitter that packs whole sentences into chunks of about
+    'chunk_tokens' estimated LLM tokens, sized for each sentence's
+    detected language, in a single pass over the text. A chunk also closes
+    early at a paragraph break once it is half full. Consecutive chunks
+    within a paragraph share up to 'overlap_tokens' of trailing sentences.
+    Text without sentence or paragraph breaks (tables, line items) is cut
+    at line breaks, or else between words, once it outgrows a few chunks.
+    Has the same feed/flush interface as StreamingTextSplitter.
+    """
+
+    def __init__(self, chunk_tokens: int = 200, overlap_tokens: int = 30):
+        if overlap_tokens >= chunk_tokens:
+            raise ValueError("overlap_tokens must be smaller than chunk_tokens")
+        self.chunk_tokens = chunk_tokens
+        self.overlap_tokens = overlap_tokens
+        # Bound on the unterminated text carried between feeds (~4 chars per token)
+        self.max_pending_chars = chunk_tokens * 8
+        self._pending = ""
+        # (sentence, separator after it, tokens, language)
+        self._current: List[Tuple[str, str, int, str]] = []
+        self._total = 0
+        self.stats = ChunkStats()
+
+    def feed(self, text: str) -> List[str]:
+        """Add text and return the chunks it completed."""
+        # The pending text had no boundary; only its trailing whitespace can
+        # start one together with the new text, so scan from there
+        scan_from = len(self._pending.rstrip())
+        text = self._pending + text
+        chunks = []
+        start = 0
+        for match in _BOUNDARY.finditer(text, scan_from):
+            if match.end() == len(text):
+                # Trailing whitespace may turn into a paragraph break next feed
+                break
+            self._add(text[start:match.start()], match.group(1) is not None, chunks)
+            start = match.end()
+        # The last sentence may continue in the next feed
+        self._pending = text[start:]
+        if len(self._pending) > self.max_pending_chars:
+            self._cut_pending(chunks)
+        return chunks
+
+    def flush(self) -> List[str]:
+        """Return the remaining chunks once all text has been fed."""
+        chunks = []
+        self._add(self._pending, True, chunks)
+        self._pending = ""
+        if self._current:
+            self._emit(chunks, keep_overlap=False)
+        return chunks
+
+    def split_text(self, text: str) -> List[str]:
+        return self.feed(text) + self.flush()
+
+    def get_stats(self) -> dict:
+        return self.stats.to_dict()
+
+    def _cut_pending(self, chunks: List[str]):
+        """Treat line breaks, then word gaps, as boundaries in overlong pending text."""
+        while len(self._pending) > self.max_pending_chars:
+            cut = self._pending.rfind("\n")
+            if cut <= 0:
+                # The last word may continue in the next feed
+                cut = self._pending.rfind(" ")
+            if cut <= 0:
+                return
+            head, self._pending = self._pending[:cut], self._pending[cut + 1:]
+            for line in head.split("\n"):
+                self._add(line, False, chunks)
+
+    def _add(self, sentence: str, paragraph_end: bool, chunks: List[str]):
+        words = sentence.split()
+        if not words:
+            if paragraph_end and self._current:
+                self._close_paragraph(chunks)
+            return
+        language = detect_language(sentence)
+        tokens = estimate_tokens(sentence, language)
+        if tokens > self.chunk_tokens:
+            # No usable boundary (tables, lists): cut the sentence by words
+            per_piece = max(1, len(words) * self.chunk_tokens // tokens)
+            pieces = [" ".join(words[i:i + per_piece]) for i in range(0, len(words), per_piece)]
+        else:
+            pieces = [" ".join(words)]
+
+        for piece in pieces:
+            piece_tokens = tokens if len(pieces) == 1 else estimate_tokens(piece, language)
+            if self._current and self._total + piece_tokens > self.chunk_tokens:
+                self._emit(chunks, keep_overlap=True)
+                # Drop the overlap too if it leaves no room for this piece
+                while self._current and self._total + piece_tokens > self.chunk_tokens:
+                    self._total -= self._current.pop(0)[2]
+            self._current.append((piece, " ", piece_tokens, language))
+            self._total += piece_tokens
+        if paragraph_end:
+            self._close_paragraph(chunks)
+
+    def _close_paragraph(self, chunks: List[str]):
+        sentence, _, tokens, language = self._current[-1]
+        self._current[-1] = (sentence, "\n\n", tokens, language)
+        if self._total * 2 >= self.chunk_tokens:
+            self._emit(chunks, keep_overlap=False)
+
+    def _emit(self, chunks: List[str], keep_overlap: bool):
+        chunk = "".join(sentence + separator for sentence, separator, _, _ in self._current).strip()
+        by_language = Counter()
+        for _, _, tokens, language in self._current:
+            by_language[language] += tokens
+        chunks.append(chunk)
+        self.stats.record(self._total, by_language.most_common(1)[0][0])
+
+        if not keep_overlap:
+            self._current = []
+            self._total = 0
+            return
+        # Keep trailing sentences worth at most 'overlap_tokens'
+        kept = 0
+        start = len(self._current)
+        while start > 0 and kept + self._current[start - 1][2] <= self.overlap_tokens:
+            start -= 1
+            kept += self._current[start][2]
+        if start == 0:
+            # The whole chunk fits in the overlap; repeating all of it adds nothing
+            start = len(self._current)
+            kept = 0
+        self._current = self._current[start:]
+        self._total = kept
@@ -0,0 +1,49 @@
+import logging
+from typing import Optional
+from app.repositories.mongo_repository import MongoRepository
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class UserCache:
+    """
+    TTL+LRU cache of the user fields authentication needs, keyed by
+    username. Anything that changes or deletes a user must call
+    'invalidate' so the next request sees the new state.
+    """
+
+    def __init__(
+        self,
+        mongo_repository: MongoRepository,
+        ttl_seconds: float = 60.0,
+        max_entries: int = 10000
+    ):
+        self.mongo_repository = mongo_repository
+        self.users = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    async def get(self, username: str) -> Optional[dict]:
+        user = self.users.get(username)
+        if user is not None:
+            self.stats["hits"] += 1
+            return dict(user)
+        self.stats["misses"] += 1
+        doc = await self.mongo_repository.get_user_by_username(username)
+        if not doc:
+            # Not cached, so a user registered right after is found immediately
+            return None
+        user = {
+            "user_id": str(doc["_id"]),
+            "sub": doc["username"],
+            "role": doc.get("role", "user"),
+        }
+        self.users.set(username, user)
+        return dict(user)
+
+    def invalidate(self, username: str) -> None:
+        self.stats["invalidations"] += 1
+        self.users.pop(username)
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "entries": len(self.users)}
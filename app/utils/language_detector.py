@@ -1,5 +1,12 @@
 import re
 
+_ARABIC_CHAR = re.compile("[\u0600-\u06FF]")
+_LATIN_CHAR = re.compile("[A-Za-z]")
+
 def is_arabic(text: str) -> bool:
-    arabic_pattern = re.compile("[\u0600-\u06FF]")
-    return bool(arabic_pattern.search(text))
\ No newline at end of file
+    return bool(_ARABIC_CHAR.search(text))
+
+def detect_language(text: str) -> str:
+    """"arabic" when Arabic letters outnumber Latin ones, else "english"."""
+    arabic = len(_ARABIC_CHAR.findall(text))
+    return "arabic" if arabic and arabic >= len(_LATIN_CHAR.findall(text)) else "english"
@@ -0,0 +1,43 @@
+import math
+import re
+import unicodedata
+from typing import List, Optional
+from app.utils.language_detector import detect_language
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+# Arabic harakat/tashkeel and tatweel carry no lexical meaning for search
+_ARABIC_DIACRITICS = re.compile("[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED\u0640]")
+_ARABIC_LETTER_FORMS = str.maketrans({
+    "\u0623": "\u0627",  # أ -> ا
+    "\u0625": "\u0627",  # إ -> ا
+    "\u0622": "\u0627",  # آ -> ا
+    "\u0649": "\u064A",  # ى -> ي
+    "\u0629": "\u0647",  # ة -> ه
+})
+
+
+def normalize_for_search(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = _ARABIC_DIACRITICS.sub("", text)
+    return text.translate(_ARABIC_LETTER_FORMS)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens with Arabic letter variants folded together."""
+    return _TOKEN_PATTERN.findall(normalize_for_search(text))
+
+
+# Subword tokens per word; Arabic morphology splits into more pieces
+TOKENS_PER_WORD = {"english": 1.3, "arabic": 2.0}
+
+
+def estimate_tokens(text: str, language: Optional[str] = None) -> int:
+    """
+    Rough LLM token count: subword tokens per word token for the text's
+    language (detected when not given), plus one per punctuation run.
+    Good enough for budgeting prompt context and sizing chunks.
+    """
+    words = len(tokenize(text))
+    punctuation = len(re.findall(r"[^\w\s]+", text))
+    factor = TOKENS_PER_WORD.get(language or detect_language(text), 1.3)
+    return math.ceil(words * factor) + punctuation